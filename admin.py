@@ -1,17 +1,13 @@
 from flask import Flask, render_template, request, redirect, url_for, session
-import sqlite3
-import os
+
+from agent import queries
+from agent.db import get_connection
 
 app = Flask(__name__)
 app.secret_key = "sentinel-admin-secret"
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "db", "database.db")
-
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return get_connection()
 
 # ---------------- ADMIN LOGIN ----------------
 @app.route("/", methods=["GET", "POST"])
@@ -23,10 +19,7 @@ def admin_login():
         conn = get_db()
         cur = conn.cursor()
 
-        admin = cur.execute("""
-            SELECT * FROM admin_users
-            WHERE username = ? AND password = ?
-        """, (username, password)).fetchone()
+        admin = cur.execute(queries.ADMIN_LOGIN_QUERY, (username, password)).fetchone()
 
         conn.close()
 
@@ -49,29 +42,17 @@ def dashboard():
     cur = conn.cursor()
 
     stats = {
-        "total_sessions": cur.execute("SELECT COUNT(*) FROM user_sessions").fetchone()[0],
-        "total_attacks": cur.execute("SELECT COUNT(*) FROM security_events").fetchone()[0],
-        "blocked_users": cur.execute("SELECT COUNT(*) FROM blocked_users").fetchone()[0],
-        "active_sessions": cur.execute("""
-            SELECT COUNT(*) FROM user_sessions
-            WHERE logout_time IS NULL
-        """).fetchone()[0]
+        "total_sessions": cur.execute(queries.TOTAL_SESSIONS_QUERY).fetchone()[0],
+        "total_attacks": cur.execute(queries.TOTAL_ATTACKS_QUERY).fetchone()[0],
+        "blocked_users": cur.execute(queries.TOTAL_BLOCKED_QUERY).fetchone()[0],
+        "active_sessions": cur.execute(queries.ACTIVE_SESSIONS_QUERY).fetchone()[0]
     }
 
     # 📊 Attacks per day
-    attack_trend = cur.execute("""
-        SELECT substr(event_time,1,10) as day, COUNT(*) as count
-        FROM security_events
-        GROUP BY day
-        ORDER BY day
-    """).fetchall()
+    attack_trend = cur.execute(queries.ATTACK_TREND_QUERY).fetchall()
 
     # 📊 Action distribution
-    action_dist = cur.execute("""
-        SELECT action_taken, COUNT(*) as count
-        FROM security_events
-        GROUP BY action_taken
-    """).fetchall()
+    action_dist = cur.execute(queries.ACTION_DIST_QUERY).fetchall()
 
     conn.close()
 
@@ -88,10 +69,7 @@ def dashboard():
 def attacks():
     admin_required()
     conn = get_db()
-    rows = conn.execute("""
-        SELECT * FROM security_events
-        ORDER BY event_time DESC
-    """).fetchall()
+    rows = conn.execute(queries.ATTACKS_QUERY).fetchall()
     conn.close()
     return render_template("admin/attacks.html", rows=rows)
 
@@ -100,10 +78,7 @@ def attacks():
 def blocked_users():
     admin_required()
     conn = get_db()
-    rows = conn.execute("""
-        SELECT * FROM blocked_users
-        ORDER BY block_time DESC
-    """).fetchall()
+    rows = conn.execute(queries.BLOCKED_USERS_QUERY).fetchall()
     conn.close()
     return render_template("admin/blocked_users.html", rows=rows)
 
@@ -113,11 +88,7 @@ def rules_heatmap():
     conn = get_db()
     cur = conn.cursor()
 
-    rows = cur.execute("""
-        SELECT triggered_rules, COUNT(*) as count
-        FROM security_events
-        WHERE triggered_rules IS NOT NULL
-    """).fetchall()
+    rows = cur.execute(queries.RULES_HEATMAP_QUERY).fetchall()
 
     rule_counts = {}
 
@@ -141,22 +112,13 @@ def session_replay():
     conn = get_db()
     cur = conn.cursor()
 
-    sessions = cur.execute("""
-        SELECT DISTINCT session_id
-        FROM request_logs
-        ORDER BY session_id DESC
-    """).fetchall()
+    sessions = cur.execute(queries.SESSION_LIST_QUERY).fetchall()
 
     selected_session = request.form.get("session_id")
     logs = []
 
     if selected_session:
-        logs = cur.execute("""
-            SELECT request_time, method, endpoint
-            FROM request_logs
-            WHERE session_id = ?
-            ORDER BY request_time
-        """, (selected_session,)).fetchall()
+        logs = cur.execute(queries.SESSION_REPLAY_QUERY, (selected_session,)).fetchall()
 
     conn.close()
 
@@ -173,13 +135,14 @@ def export_security_events():
     conn = get_db()
     cur = conn.cursor()
 
-    rows = cur.execute("SELECT * FROM security_events").fetchall()
+    rows = cur.execute(queries.EXPORT_EVENTS_QUERY).fetchall()
     conn.close()
 
     def generate():
         yield "session_id,risk_score,ml_score,action,event_time\n"
         for r in rows:
-            yield f"{r['session_id']},{r['risk_score']},{r['ml_score']},{r['action_taken']},{r['event_time']}\n"
+            ml_score = "" if r['ml_score'] is None else r['ml_score']
+            yield f"{r['session_id']},{r['risk_score']},{ml_score},{r['action_taken']},{r['event_time']}\n"
 
     return Response(
         generate(),
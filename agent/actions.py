@@ -1,3 +1,10 @@
+from functools import lru_cache
+
+import numpy as np
+
+from agent.rule_engine import engine
+
+
 def decide_action(risk_score):
     if risk_score >= 70:
         return "BLOCK"
@@ -5,3 +12,49 @@ def decide_action(risk_score):
         return "WARN"
     else:
         return "ALLOW"
+
+
+# The evaluate_session decision table lives in agent/rules.json ("decisions"):
+# first row whose rule-risk AND ML minimums are both met wins; nothing
+# matching means the default (ALLOW).
+
+
+def decide(rule_risk, ml_score):
+    """Return (action, reason) for one session"""
+    table, default = engine.decisions()
+    for action, min_rules, min_ml, reason in table:
+        if rule_risk >= min_rules and ml_score >= min_ml:
+            return action, reason
+    return default
+
+
+def decide_without_ml(rule_risk):
+    """
+    (action, reason) when the rule risk alone fixes the verdict for any
+    ML score, else None - the model only needs to run in the None case.
+    """
+    engine.decisions()   # pick up a reloaded table before using the cache
+    return _decide_without_ml(rule_risk, engine.version)
+
+
+@lru_cache(maxsize=4096)
+def _decide_without_ml(rule_risk, version):
+    table, _ = engine.decisions()
+    # decide() only changes where the ML score crosses a row's minimum, so
+    # checking each of them covers every score the model could return
+    breakpoints = sorted({0.0} | {min_ml for _, _, min_ml, _ in table})
+    outcomes = {decide(rule_risk, ml_score) for ml_score in breakpoints}
+    return outcomes.pop() if len(outcomes) == 1 else None
+
+
+def decide_batch(rule_risk, ml_score):
+    """Vectorized decide(): arrays in, array of actions out"""
+    table, default = engine.decisions()
+    rule_risk = np.asarray(rule_risk)
+    ml_score = np.asarray(ml_score)
+    return np.select(
+        [(rule_risk >= min_rules) & (ml_score >= min_ml)
+         for _, min_rules, min_ml, _ in table],
+        [action for action, _, _, _ in table],
+        default=default[0]
+    )
@@ -1,6 +1,27 @@
-from agent.memory import get_session_state
-from agent.ml_tool import ml_predict
-from agent.actions import decide_action
+import numpy as np
+
+from agent.memory import get_session_state, get_session_states
+from agent.ml_tool import ml_predict, ml_predict_batch, ML_INPUT_FIELDS
+from agent.actions import decide, decide_batch, decide_without_ml
+from agent.rule_engine import engine
+from agent.rules import score_session_rules, score_session_rules_batch
+from agent.verdict_cache import VerdictCache
+
+ML_MIN_REQUESTS = 10
+
+# How often the model actually ran vs. was skipped (few requests, or the
+# rule risk alone already fixed the verdict)
+ml_counters = {"ran": 0, "skipped_fixed_verdict": 0, "skipped_few_requests": 0}
+
+# Last verdict per session; reused while the scored features are unchanged
+verdict_cache = VerdictCache()
+
+
+def state_fingerprint(session):
+    """Everything the verdict depends on: scored fields + rule table version"""
+    fields = sorted(set(engine.ruleset("session").fields) | set(ML_INPUT_FIELDS))
+    return (engine.version,) + tuple(session[field] for field in fields)
+
 
 def evaluate_session(session_id):
     """
@@ -12,6 +33,12 @@ def evaluate_session(session_id):
         print("❌ No session found!")
         return None
 
+    fingerprint = state_fingerprint(session)
+    cached = verdict_cache.get(session_id, fingerprint)
+    if cached is not None:
+        print(f"♻️ Session {session_id} unchanged since last evaluation: {cached['action']}")
+        return cached
+
     print(f"\n{'='*60}")
     print(f"🔍 EVALUATING SESSION: {session_id}")
     print(f"{'='*60}")
@@ -23,111 +50,120 @@ def evaluate_session(session_id):
     print(f"   - Max Request Rate: {session.get('max_request_rate')}")
     print(f"   - Session Duration: {session.get('session_duration')}")
 
-    rule_risk = 0
-    rules_triggered = []
-
     # ---------- AGGRESSIVE RULE ENGINE ----------
-    
-    # 🚨 CRITICAL: Extremely fast request rate (clear bot attack)
-    if session["max_request_rate"] and session["max_request_rate"] > 10:
-        rule_risk += 50
-        rules_triggered.append(f"Extremely fast request rate ({session['max_request_rate']:.1f} req/s)")
-        print(f"🚨 CRITICAL: Bot-like request rate ({session['max_request_rate']:.2f} req/s)")
-    
-    # 🚨 HIGH: Fast request rate (likely automated)
-    elif session["max_request_rate"] and session["max_request_rate"] > 5:
-        rule_risk += 35
-        rules_triggered.append(f"Fast request rate ({session['max_request_rate']:.1f} req/s)")
-        print(f"🚨 HIGH: Fast request rate ({session['max_request_rate']:.2f} req/s)")
-
-    # 🚨 CRITICAL: Bot-like intervals (automated script)
-    if session["avg_request_interval"] and session["avg_request_interval"] < 0.1:
-        rule_risk += 45
-        rules_triggered.append(f"Bot-like intervals ({session['avg_request_interval']:.3f}s)")
-        print(f"🚨 CRITICAL: Bot intervals ({session['avg_request_interval']:.3f}s avg)")
-    
-    # 🚨 HIGH: Very short intervals
-    elif session["avg_request_interval"] and session["avg_request_interval"] < 0.3:
-        rule_risk += 30
-        rules_triggered.append(f"Very short intervals ({session['avg_request_interval']:.3f}s)")
-        print(f"🚨 HIGH: Short intervals ({session['avg_request_interval']:.3f}s avg)")
-
-    # 🚨 MEDIUM: Rapid fire pattern
-    if session["avg_request_interval"] and session["avg_request_interval"] < 0.5:
-        if session["total_requests"] and session["total_requests"] > 20:
-            rule_risk += 25
-            rules_triggered.append(f"Rapid-fire pattern ({session['total_requests']} requests)")
-            print(f"🚨 MEDIUM: Rapid-fire ({session['total_requests']} requests)")
-
-    # 🚨 HIGH: Multiple failed login attempts
-    if session["failed_logins"] >= 3:
-        rule_risk += 40
-        rules_triggered.append(f"Multiple failed logins ({session['failed_logins']})")
-        print(f"🚨 HIGH: Failed logins ({session['failed_logins']})")
-
-    # 🚨 MEDIUM: Excessive request volume
-    if session["total_requests"] and session["total_requests"] > 50:
-        rule_risk += 20
-        rules_triggered.append(f"Excessive requests ({session['total_requests']})")
-        print(f"🚨 MEDIUM: Too many requests ({session['total_requests']})")
-    
-    # 🚨 HIGH: Way too many requests
-    if session["total_requests"] and session["total_requests"] > 100:
-        rule_risk += 30
-        rules_triggered.append(f"Attack-level volume ({session['total_requests']})")
-        print(f"🚨 HIGH: Attack volume ({session['total_requests']})")
-
+    rule_risk, rules_triggered = score_session_rules(session)
     print(f"\n⚖️ Rule Risk Score: {rule_risk}")
     print(f"🚨 Triggered Rules: {rules_triggered}")
 
     # ---------- ML ENGINE ----------
+    # Rules are cheap and always run; the model only runs when its score
+    # could still change the verdict.  None records that it never ran.
     ml_score = 0.0
-    if session["total_requests"] and session["total_requests"] >= 10:
+    ml_failed = False
+    fixed = decide_without_ml(rule_risk)
+    if fixed is not None:
+        ml_score = None
+        ml_counters["skipped_fixed_verdict"] += 1
+        print(f"⏭️ ML skipped: rule risk {rule_risk} decides {fixed[0]} on its own")
+    elif session["total_requests"] and session["total_requests"] >= ML_MIN_REQUESTS:
+        ml_counters["ran"] += 1
         try:
             ml_score = ml_predict(session)
             print(f"🤖 ML Score: {ml_score:.3f}")
         except Exception as e:
             print(f"⚠️ ML prediction failed: {e}")
             ml_score = 0.0
+            ml_failed = True
     else:
+        ml_counters["skipped_few_requests"] += 1
         print(f"⚠️ Not enough requests ({session.get('total_requests', 0)}) for ML")
 
     # ---------- AGGRESSIVE DECISION ENGINE ----------
-    
-    # 🔴 IMMEDIATE BLOCK CONDITIONS
-    if rule_risk >= 70:
-        action = "BLOCK"
-        print(f"🔴 BLOCKING: Critical rule risk ({rule_risk})")
-    
-    elif ml_score >= 0.85:
-        action = "BLOCK"
-        print(f"🔴 BLOCKING: Very high ML confidence ({ml_score:.2f})")
-    
-    elif ml_score >= 0.7 and rule_risk >= 40:
-        action = "BLOCK"
-        print(f"🔴 BLOCKING: High ML ({ml_score:.2f}) + Moderate rules ({rule_risk})")
-    
-    elif rule_risk >= 50 and ml_score >= 0.5:
-        action = "BLOCK"
-        print(f"🔴 BLOCKING: High rules ({rule_risk}) + ML confirmation ({ml_score:.2f})")
-    
-    # 🟡 WARNING CONDITIONS
-    elif rule_risk >= 40 or ml_score >= 0.6:
-        action = "WARN"
-        print(f"🟡 WARNING: Moderate risk (rules: {rule_risk}, ML: {ml_score:.2f})")
-    
-    # 🟢 ALLOW
-    else:
-        action = "ALLOW"
-        print(f"🟢 ALLOWING: Low risk (rules: {rule_risk}, ML: {ml_score:.2f})")
+    action, reason = fixed or decide(rule_risk, ml_score)
+    icon = {"BLOCK": "🔴", "WARN": "🟡", "ALLOW": "🟢"}[action]
+    ml_shown = "skipped" if ml_score is None else f"{ml_score:.2f}"
+    print(f"{icon} {action}: {reason} (rules: {rule_risk}, ML: {ml_shown})")
 
     print(f"\n✅ Final Decision: {action}")
     print(f"{'='*60}\n")
 
-    return {
+    result = {
         "session_id": session_id,
         "risk_score": rule_risk,
         "ml_score": ml_score,
         "rules_triggered": rules_triggered,
         "action": action
-    }
\ No newline at end of file
+    }
+
+    # A verdict made without the model's opinion is not worth reusing
+    if not ml_failed:
+        verdict_cache.put(session_id, fingerprint, result)
+
+    return result
+
+
+def evaluate_sessions(session_ids):
+    """
+    Batch form of evaluate_session for sweeps and re-scoring.
+    One SELECT for all rows, rules as array operations and a single
+    predict_proba call; returns the same result dicts in input order
+    (None for unknown sessions).  Sessions whose scored state has not
+    changed reuse their cached verdict.
+    """
+    states = get_session_states(session_ids)
+
+    results = {}
+    fingerprints = {}
+    for session_id, session in states.items():
+        fingerprints[session_id] = state_fingerprint(session)
+        cached = verdict_cache.get(session_id, fingerprints[session_id])
+        if cached is not None:
+            results[session_id] = cached
+
+    found = [s for s in dict.fromkeys(session_ids) if s in states and s not in results]
+    if found:
+        results.update(_score_sessions(found, [states[s] for s in found], fingerprints))
+
+    return [results.get(session_id) for session_id in session_ids]
+
+
+def _score_sessions(found, sessions, fingerprints):
+    rule_risk, rules_triggered = score_session_rules_batch(sessions)
+
+    total_requests = np.array([s["total_requests"] or 0 for s in sessions])
+    fixed = np.array([decide_without_ml(int(r)) is not None for r in rule_risk], dtype=bool)
+    enough = total_requests >= ML_MIN_REQUESTS
+    eligible = np.flatnonzero(enough & ~fixed)
+
+    ml_counters["ran"] += len(eligible)
+    ml_counters["skipped_fixed_verdict"] += int(fixed.sum())
+    ml_counters["skipped_few_requests"] += int((~enough & ~fixed).sum())
+
+    ml_score = np.zeros(len(sessions))
+    ml_failed = False
+    if len(eligible):
+        try:
+            ml_score[eligible] = ml_predict_batch([sessions[i] for i in eligible])
+        except Exception as e:
+            print(f"⚠️ Batch ML prediction failed: {e}")
+            ml_failed = True
+
+    actions = decide_batch(rule_risk, ml_score)
+
+    results = {
+        session_id: {
+            "session_id": session_id,
+            "risk_score": int(rule_risk[i]),
+            "ml_score": None if fixed[i] else float(ml_score[i]),
+            "rules_triggered": rules_triggered[i],
+            "action": str(actions[i])
+        }
+        for i, session_id in enumerate(found)
+    }
+    print(f"🤖 Batch evaluated {len(found)} sessions ({len(eligible)} scored by ML)")
+
+    for i, session_id in enumerate(found):
+        if not (ml_failed and enough[i] and not fixed[i]):
+            verdict_cache.put(session_id, fingerprints[session_id], results[session_id])
+
+    return results
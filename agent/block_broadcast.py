@@ -0,0 +1,83 @@
+import threading
+
+from agent.db import pooled_connection
+from agent.queries import BLOCK_LOG_LAST_SEQ_QUERY, BLOCK_LOG_PUBLISH_QUERY, BLOCK_LOG_POLL_QUERY
+from agent.timeutil import now_ms
+
+
+class BlockBroadcast:
+    """
+    Carries session and user blocks across worker processes.
+    publish() appends to the block_log table and bumps a generation
+    counter in shared memory (a multiprocessing.Value created before the
+    workers fork).  poll() is one shared-memory read per request; only
+    when the counter has moved does it read the new block_log rows and
+    hand them to the subscribers.  Without attach() (single process)
+    both are cheap no-ops beyond the block_log insert.
+    """
+
+    def __init__(self):
+        self._generation = None
+        self._seen = 0
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+        self.published = 0
+        self.received = 0
+
+    def attach(self, generation):
+        """Share blocks through `generation`; call in the parent before forking"""
+        self._generation = generation
+        self._seen = generation.value
+        with pooled_connection() as conn:
+            row = conn.execute(BLOCK_LOG_LAST_SEQ_QUERY).fetchone()
+        self._last_seq = row[0] or 0
+
+    def subscribe(self, callback):
+        """callback(session_ids, usernames) receives blocks made by any worker"""
+        self._subscribers.append(callback)
+
+    def publish(self, session_id=None, username=None):
+        with pooled_connection() as conn:
+            conn.execute(BLOCK_LOG_PUBLISH_QUERY, (session_id, username, now_ms()))
+            conn.commit()
+        self.published += 1
+
+        # Bump only after the commit so readers always find the row
+        if self._generation is not None:
+            with self._generation.get_lock():
+                self._generation.value += 1
+
+    def poll(self):
+        """Deliver blocks published since the last poll to the subscribers"""
+        if self._generation is None:
+            return
+
+        generation = self._generation.value
+        if generation == self._seen:
+            return
+
+        with self._lock:
+            if generation == self._seen:
+                return
+
+            with pooled_connection() as conn:
+                rows = conn.execute(BLOCK_LOG_POLL_QUERY, (self._last_seq,)).fetchall()
+
+            if rows:
+                self._last_seq = rows[-1][0]
+            self._seen = generation
+            self.received += len(rows)
+
+        if not rows:
+            return
+
+        session_ids = [row[1] for row in rows if row[1] is not None]
+        usernames = [row[2] for row in rows if row[2] is not None]
+        for callback in self._subscribers:
+            callback(session_ids, usernames)
+
+
+# One per process; serve.py attaches it to the shared generation counter
+broadcast = BlockBroadcast()
@@ -0,0 +1,160 @@
+import hashlib
+import math
+import threading
+
+from agent.block_broadcast import broadcast as block_broadcast
+from agent.db import pooled_connection
+from agent.queries import BLOCKED_USERNAMES_QUERY
+
+BLOOM_CAPACITY = 10000       # usernames before the filter is resized
+BLOOM_ERROR_RATE = 0.001     # false-positive rate at capacity
+RECONCILE_INTERVAL = 60.0    # seconds between full reloads from blocked_users
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+    The k bit positions come from one blake2b digest by double hashing.
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class BlockedUserIndex:
+    """
+    In-memory copy of blocked_users for the login path.
+    A Bloom filter answers "definitely not blocked" (the common case)
+    without touching SQLite or taking a lock; a hit is confirmed against
+    the exact set.  Blocks made in this process are added directly, those
+    from other workers arrive through the block broadcast, and a
+    background reload every RECONCILE_INTERVAL seconds catches anything
+    else (rows written or deleted outside the app).
+    """
+
+    def __init__(self, broadcast=block_broadcast, reconcile_interval=RECONCILE_INTERVAL):
+        self.broadcast = broadcast
+        self.reconcile_interval = reconcile_interval
+        self._names = set()
+        self._bloom = BloomFilter()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._loaded = False
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.lookups = 0
+        self.bloom_rejections = 0
+        self.reconciles = 0
+
+        if broadcast is not None:
+            broadcast.subscribe(self._apply_remote_blocks)
+
+    # ---------- lifecycle ----------
+
+    def load(self):
+        """Build the index from blocked_users and start the reconcile thread"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self.reconcile()
+            self._thread = threading.Thread(
+                target=self._run, name="blocked-user-reconcile", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.reconcile_interval):
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"❌ ERROR IN blocked user reconcile: {e}")
+
+    def reconcile(self):
+        """Replace the index with the current contents of blocked_users"""
+        # Held across the read so a block added meanwhile lands after the swap
+        with self._lock:
+            with pooled_connection() as conn:
+                rows = conn.execute(BLOCKED_USERNAMES_QUERY).fetchall()
+            names = {row[0] for row in rows}
+
+            bloom = BloomFilter(capacity=max(BLOOM_CAPACITY, 2 * len(names)))
+            for name in names:
+                bloom.add(name)
+
+            self._names = names
+            self._bloom = bloom
+            self._loaded = True
+        self.reconciles += 1
+
+    # ---------- lookups ----------
+
+    def contains(self, username):
+        if not self._loaded:
+            self.load()
+        if self.broadcast is not None:
+            self.broadcast.poll()
+
+        self.lookups += 1
+        if username not in self._bloom:
+            self.bloom_rejections += 1
+            return False
+        return username in self._names
+
+    # ---------- updates ----------
+
+    def add(self, username, publish=True):
+        """Record a new block here and, with publish, in every other worker"""
+        self._add_local(username)
+        if publish and self.broadcast is not None:
+            self.broadcast.publish(username=username)
+
+    def _add_local(self, username):
+        with self._lock:
+            if username in self._names:
+                return
+            self._names.add(username)
+            if self._bloom.count >= self._bloom.capacity:
+                bloom = BloomFilter(capacity=2 * self._bloom.capacity)
+                for name in self._names:
+                    bloom.add(name)
+                self._bloom = bloom
+            else:
+                self._bloom.add(username)
+
+    def _apply_remote_blocks(self, session_ids, usernames):
+        for username in usernames:
+            self._add_local(username)
+
+    def stats(self):
+        return {
+            "blocked": len(self._names),
+            "lookups": self.lookups,
+            "bloom_rejections": self.bloom_rejections,
+            "reconciles": self.reconciles,
+        }
+
+
+blocked_users = BlockedUserIndex()
@@ -0,0 +1,162 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "db", "database.db")
+
+BUSY_TIMEOUT_MS = 10000
+STATEMENT_CACHE_SIZE = 256
+POOL_SIZE = 16          # connections per process
+POOL_TIMEOUT = 30.0     # seconds to wait for a free connection
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Connection that goes back to the pool on close().
+    Any transaction the caller left open is rolled back first so the
+    next borrower starts clean.
+    """
+
+    def close(self):
+        if self.in_use:
+            self.in_use = False
+            if self.in_transaction:
+                self.rollback()
+            self.pool.release(self)
+
+    def really_close(self):
+        super().close()
+
+    def __del__(self):
+        # Dropped by a borrower that never closed it: free its pool slot
+        if getattr(self, "in_use", False):
+            self.pool.discard()
+
+
+def _connect(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=PooledConnection
+    )
+    conn.row_factory = sqlite3.Row
+    conn.path = path
+    conn.in_use = False
+
+    # WAL lets the admin panel read while the request path writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Bounded pool of connections shared by every thread of the process.
+
+    Connections are opened on demand up to size and each one runs its
+    PRAGMAs once; after that a checkout is a queue get.  When all of them
+    are out, callers wait up to timeout seconds for one to come back.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open_or_wait()
+
+        if conn.path != DB_PATH:
+            conn.really_close()
+            conn = _connect(DB_PATH)
+
+        conn.pool = self
+        conn.in_use = True
+        return conn
+
+    def _open_or_wait(self):
+        with self._lock:
+            if self.opened < self.size:
+                self.opened += 1
+                opened = True
+            else:
+                opened = False
+
+        if opened:
+            try:
+                return _connect(DB_PATH)
+            except Exception:
+                with self._lock:
+                    self.opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"no pooled connection free after {self.timeout}s ({self.size} in use)"
+            ) from None
+
+    def release(self, conn):
+        self._idle.put(conn)
+
+    def discard(self):
+        with self._lock:
+            self.opened -= 1
+
+    def close_idle(self):
+        """Really close every connection in the pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.really_close()
+            self.discard()
+
+
+_pool = ConnectionPool()
+
+
+def get_connection():
+    """Borrow a connection from the pool; close() gives it back"""
+    return _pool.acquire()
+
+
+@contextmanager
+def pooled_connection():
+    """`with pooled_connection() as conn:` borrows a connection for the block"""
+    conn = _pool.acquire()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _forget_connections():
+    """
+    Connections opened before fork() must not be used in the child:
+    drop the inherited pool (without closing its connections, the parent
+    still owns them) so the child opens its own on first use.
+    """
+    global _pool
+    _pool = ConnectionPool()
+
+
+os.register_at_fork(after_in_child=_forget_connections)
+
+
+def close_connection():
+    """Really close this process's idle connections (worker shutdown)"""
+    _pool.close_idle()
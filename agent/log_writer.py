@@ -0,0 +1,161 @@
+import atexit
+import queue
+import threading
+import time
+
+from agent.db import pooled_connection
+from agent.queries import REQUEST_LOG_INSERT_QUERY, SECURITY_EVENT_INSERT_QUERY
+
+BATCH_SIZE = 200        # rows per transaction
+MAX_DELAY_MS = 50       # oldest row in a partial batch waits at most this long
+MAX_QUEUE = 10000       # rows buffered before new rows are dropped
+
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Background writer fed by a bounded queue.
+    Rows are written with executemany in one transaction every
+    BATCH_SIZE rows or MAX_DELAY_MS milliseconds, whichever comes first.
+    When the queue is full new rows are dropped and counted instead of
+    blocking the request thread.
+    """
+
+    def __init__(self, sql, name, batch_size=BATCH_SIZE,
+                 max_delay_ms=MAX_DELAY_MS, max_queue=MAX_QUEUE):
+        self.sql = sql
+        self.name = name
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._flush_hooks = []
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        """Write everything still queued and end the writer thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # ---------- producers ----------
+
+    def submit(self, row):
+        """Queue one row; returns False if it was dropped (queue full)"""
+        self.start()
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=5):
+        """Block until every row queued before this call is committed"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done, timeout=timeout)
+        return done.wait(timeout)
+
+    def add_flush_hook(self, hook):
+        """Call hook(rows) on the writer thread after every committed batch"""
+        self._flush_hooks.append(hook)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    # ---------- writer thread ----------
+
+    def _run(self):
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if not batch else max(0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None   # partial batch hit its deadline
+
+            if item is _STOP:
+                self._write(batch)
+                return
+
+            if isinstance(item, threading.Event):
+                self._write(batch)
+                batch = []
+                item.set()
+                continue
+
+            if item is not None:
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.max_delay
+                if len(batch) < self.batch_size:
+                    continue
+
+            self._write(batch)
+            batch = []
+
+    def _write(self, batch):
+        if not batch:
+            return
+
+        with pooled_connection() as conn:
+            try:
+                conn.executemany(self.sql, batch)
+                conn.commit()
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                conn.rollback()
+                self.failed += len(batch)
+                print(f"❌ ERROR IN {self.name}: {e}")
+                return
+
+        for hook in self._flush_hooks:
+            try:
+                hook(batch)
+            except Exception as e:
+                print(f"❌ ERROR IN {self.name} flush hook: {e}")
+
+
+class RequestLogWriter(BatchWriter):
+    """Batched writer for request_logs rows (session_id, endpoint, time, method, code, ts_ms)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(REQUEST_LOG_INSERT_QUERY, name="request-log-writer", **kwargs)
+
+
+class SecurityEventWriter(BatchWriter):
+    """
+    Batched writer for security_events rows
+    (session_id, username, risk, ml_score, rules, action, time, ts_ms)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(SECURITY_EVENT_INSERT_QUERY, name="security-event-writer", **kwargs)
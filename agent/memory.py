@@ -1,23 +1,22 @@
-import sqlite3
-from datetime import datetime
+from agent.blocklist import blocked_users
+from agent.db import get_connection
+from agent.log_writer import SecurityEventWriter
+from agent.queries import (
+    SESSION_ROW_QUERY, SESSION_STATES_QUERY, SESSION_BLOCK_QUERY, SESSION_USERNAME_QUERY,
+    BLOCKED_USER_INSERT_QUERY, BLOCK_USER_QUERY
+)
+from agent.timeutil import now_ms, ms_to_iso
 
-DB_PATH = "db/database.db"
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return get_connection()
 
 
 def get_session_state(session_id):
     conn = get_db()
     cur = conn.cursor()
 
-    row = cur.execute("""
-        SELECT *
-        FROM user_sessions
-        WHERE session_id = ?
-    """, (session_id,)).fetchone()
+    row = cur.execute(SESSION_ROW_QUERY, (session_id,)).fetchone()
 
     conn.close()
 
@@ -27,53 +26,70 @@ def get_session_state(session_id):
     return dict(row)
 
 
-def store_event(result):
-    """Store security event in database"""
-    try:
-        conn = get_db()
-        cur = conn.cursor()
+SQLITE_MAX_PARAMS = 500
 
-        # Get username from session
-        username = cur.execute("""
-            SELECT username FROM user_sessions WHERE session_id = ?
-        """, (result["session_id"],)).fetchone()
-        
-        username = username["username"] if username else "unknown"
-
-        cur.execute("""
-            INSERT INTO security_events (
-                session_id,
-                username,
-                risk_score,
-                ml_score,
-                triggered_rules,
-                action_taken,
-                event_time
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            result["session_id"],
-            username,
-            float(result["risk_score"]),
-            float(result["ml_score"]),
-            ", ".join(result["rules_triggered"]),
-            result["action"],
-            datetime.utcnow().isoformat()
-        ))
 
-        # 🔥 ENFORCEMENT: Mark session as blocked
-        if result["action"] == "BLOCK":
-            print(f"🚨 MARKING SESSION AS BLOCKED: {result['session_id']}")
-            cur.execute("""
-                UPDATE user_sessions
-                SET is_blocked = 1
-                WHERE session_id = ?
-            """, (result["session_id"],))
+def get_session_states(session_ids):
+    """Load many user_sessions rows at once; returns {session_id: row dict}"""
+    conn = get_db()
+    states = {}
+
+    ids = list(dict.fromkeys(session_ids))
+    for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+        chunk = ids[start:start + SQLITE_MAX_PARAMS]
+        placeholders = ", ".join("?" * len(chunk))
+        for row in conn.execute(SESSION_STATES_QUERY.format(placeholders=placeholders), chunk):
+            states[row["session_id"]] = dict(row)
 
+    conn.close()
+    return states
+
+
+# security_events rows are queued and committed in batches off the caller's thread
+event_sink = SecurityEventWriter()
+
+
+def record_event(result, username, block_flag_written=False):
+    """
+    Queue one security event; the caller supplies the username.
+    A BLOCK verdict still sets user_sessions.is_blocked right away unless
+    the caller has already done so (block_flag_written=True).
+    """
+    ts = now_ms()
+
+    if result["action"] == "BLOCK" and not block_flag_written:
+        print(f"🚨 MARKING SESSION AS BLOCKED: {result['session_id']}")
+        conn = get_db()
+        conn.execute(SESSION_BLOCK_QUERY, (result["session_id"],))
         conn.commit()
         conn.close()
 
-        print("✅ SECURITY EVENT STORED")
+    return event_sink.submit((
+        result["session_id"],
+        username or "unknown",
+        float(result["risk_score"]),
+        None if result["ml_score"] is None else float(result["ml_score"]),
+        ", ".join(result["rules_triggered"]),
+        result["action"],
+        ms_to_iso(ts),
+        ts
+    ))
+
+
+def flush_events(timeout=5):
+    """Block until every queued security event is committed"""
+    return event_sink.flush(timeout)
+
+
+def store_event(result):
+    """Store security event in database (looks the username up; prefer record_event)"""
+    try:
+        conn = get_db()
+        username = conn.execute(SESSION_USERNAME_QUERY, (result["session_id"],)).fetchone()
+        conn.close()
+
+        record_event(result, username["username"] if username else None)
+        print("✅ SECURITY EVENT QUEUED")
 
     except Exception as e:
         print(f"❌ ERROR IN store_event: {e}")
@@ -92,32 +108,26 @@ def permanently_block_user(username, session_id, rules_triggered):
         print(f"🚫 PERMANENTLY BLOCKING USER: {username}")
         print(f"{'='*60}")
 
+        ts = now_ms()
+
         # Add to blocked_users table
-        cur.execute("""
-            INSERT OR REPLACE INTO blocked_users (
-                username,
-                block_reason,
-                block_time,
-                session_id
-            )
-            VALUES (?, ?, ?, ?)
-        """, (
+        cur.execute(BLOCKED_USER_INSERT_QUERY, (
             username,
             ", ".join(rules_triggered) if rules_triggered else "Attack pattern detected",
-            datetime.utcnow().isoformat(),
-            session_id
+            ms_to_iso(ts),
+            session_id,
+            ts
         ))
 
         # Also mark user as blocked in users table
-        cur.execute("""
-            UPDATE users
-            SET is_blocked = 1
-            WHERE username = ?
-        """, (username,))
+        cur.execute(BLOCK_USER_QUERY, (username,))
 
         conn.commit()
         conn.close()
 
+        # Login checks read the in-memory index, not the table
+        blocked_users.add(username)
+
         print(f"✅ USER '{username}' PERMANENTLY BLOCKED")
         print(f"   - Reason: {', '.join(rules_triggered) if rules_triggered else 'Attack detected'}")
         print(f"   - Session: {session_id}")
@@ -130,18 +140,10 @@ def permanently_block_user(username, session_id, rules_triggered):
 
 
 def is_user_blocked(username):
-    """Check if a username is permanently blocked"""
+    """Check if a username is permanently blocked (in-memory index, see agent/blocklist.py)"""
     try:
-        conn = get_db()
-        cur = conn.cursor()
-
-        result = cur.execute("""
-            SELECT username FROM blocked_users WHERE username = ?
-        """, (username,)).fetchone()
-
-        conn.close()
-        return result is not None
+        return blocked_users.contains(username)
 
     except Exception as e:
         print(f"❌ ERROR IN is_user_blocked: {e}")
-        return False
\ No newline at end of file
+        return False
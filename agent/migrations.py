@@ -0,0 +1,371 @@
+"""
+Versioned schema migrations for the SQLite store.
+
+Each migration runs once, in order, inside its own transaction and
+bumps schema_version.  Run directly to migrate and verify query plans:
+
+    python -m agent.migrations
+"""
+import sqlite3
+import sys
+from datetime import datetime
+
+from agent import queries
+from agent.db import get_connection, pooled_connection
+from agent.rate_tracker import SessionAggregate
+from agent.timeutil import ISO_TO_MS_SQL
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _backfill_session_aggregates(conn):
+    """Seed running aggregates for sessions that are still open"""
+    open_sessions = conn.execute("""
+        SELECT session_id FROM user_sessions WHERE logout_time IS NULL
+    """).fetchall()
+
+    for (session_id,) in open_sessions:
+        aggregate = SessionAggregate()
+        for (request_time,) in conn.execute("""
+            SELECT request_time FROM request_logs
+            WHERE session_id = ?
+            ORDER BY request_time
+        """, (session_id,)):
+            aggregate.record((datetime.fromisoformat(request_time) - EPOCH).total_seconds())
+
+        conn.execute("""
+            UPDATE user_sessions
+            SET first_request_at = ?, last_request_at = ?, interval_count = ?,
+                interval_sum = ?, min_request_interval = ?, interval_m2 = ?
+            WHERE session_id = ?
+        """, (aggregate.first_ts, aggregate.last_ts, aggregate.interval_count,
+              aggregate.interval_sum, aggregate.min_interval, aggregate.interval_m2,
+              session_id))
+
+
+def _drop_request_at_columns(conn):
+    # ALTER TABLE ... DROP COLUMN needs SQLite 3.35; older builds keep them
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        conn.execute("ALTER TABLE user_sessions DROP COLUMN first_request_at")
+        conn.execute("ALTER TABLE user_sessions DROP COLUMN last_request_at")
+
+
+MIGRATIONS = [
+    (1, "base schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            is_blocked INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            username TEXT,
+            ip_address TEXT,
+            user_agent TEXT,
+            login_time TEXT,
+            logout_time TEXT,
+            session_duration INTEGER,
+            total_requests INTEGER DEFAULT 0,
+            failed_logins INTEGER DEFAULT 0,
+            avg_request_interval REAL,
+            max_request_rate REAL,
+            is_authenticated INTEGER DEFAULT 0,
+            is_blocked INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS request_logs (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            endpoint TEXT,
+            request_time TEXT,
+            method TEXT,
+            response_code INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS security_events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            username TEXT,
+            risk_score REAL,
+            ml_score REAL,
+            triggered_rules TEXT,
+            action_taken TEXT,
+            event_time TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS blocked_users (
+            username TEXT PRIMARY KEY,
+            block_reason TEXT,
+            block_time TEXT,
+            session_id TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password TEXT
+        )
+        """,
+    ]),
+
+    (2, "hot-path indexes", [
+        # Logout metrics, session replay and its session list (covering)
+        """
+        CREATE INDEX IF NOT EXISTS idx_request_logs_session_time
+        ON request_logs (session_id, request_time, method, endpoint)
+        """,
+        # Admin: attack log ordering, per-day trend
+        """
+        CREATE INDEX IF NOT EXISTS idx_security_events_time
+        ON security_events (event_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_security_events_day
+        ON security_events (substr(event_time, 1, 10))
+        """,
+        # Admin: active session count, blocked user list
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_sessions_logout
+        ON user_sessions (logout_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_blocked_users_time
+        ON blocked_users (block_time)
+        """,
+    ]),
+
+    (3, "running session aggregates", [
+        "ALTER TABLE user_sessions ADD COLUMN first_request_at REAL",
+        "ALTER TABLE user_sessions ADD COLUMN last_request_at REAL",
+        "ALTER TABLE user_sessions ADD COLUMN interval_count INTEGER DEFAULT 0",
+        "ALTER TABLE user_sessions ADD COLUMN interval_sum REAL DEFAULT 0",
+        "ALTER TABLE user_sessions ADD COLUMN min_request_interval REAL",
+        "ALTER TABLE user_sessions ADD COLUMN interval_m2 REAL DEFAULT 0",
+        _backfill_session_aggregates,
+    ]),
+
+    # Integer epoch-ms columns become the canonical time store; the TEXT
+    # columns are still written for display. first/last_request_at are
+    # superseded by the *_ts columns and no longer read.
+    (4, "epoch-ms timestamps", [
+        "ALTER TABLE request_logs ADD COLUMN request_ts INTEGER",
+        "ALTER TABLE security_events ADD COLUMN event_ts INTEGER",
+        "ALTER TABLE blocked_users ADD COLUMN block_ts INTEGER",
+        "ALTER TABLE user_sessions ADD COLUMN login_ts INTEGER",
+        "ALTER TABLE user_sessions ADD COLUMN logout_ts INTEGER",
+        "ALTER TABLE user_sessions ADD COLUMN first_request_ts INTEGER",
+        "ALTER TABLE user_sessions ADD COLUMN last_request_ts INTEGER",
+        f"UPDATE request_logs SET request_ts = {ISO_TO_MS_SQL.format(col='request_time')}",
+        f"UPDATE security_events SET event_ts = {ISO_TO_MS_SQL.format(col='event_time')}",
+        f"UPDATE blocked_users SET block_ts = {ISO_TO_MS_SQL.format(col='block_time')}",
+        f"""
+        UPDATE user_sessions
+        SET login_ts = {ISO_TO_MS_SQL.format(col='login_time')},
+            logout_ts = {ISO_TO_MS_SQL.format(col='logout_time')},
+            first_request_ts = CAST(round(first_request_at * 1000) AS INTEGER),
+            last_request_ts = CAST(round(last_request_at * 1000) AS INTEGER)
+        """,
+        "DROP INDEX IF EXISTS idx_request_logs_session_time",
+        "DROP INDEX IF EXISTS idx_security_events_time",
+        "DROP INDEX IF EXISTS idx_security_events_day",
+        "DROP INDEX IF EXISTS idx_blocked_users_time",
+        """
+        CREATE INDEX IF NOT EXISTS idx_request_logs_session_ts
+        ON request_logs (session_id, request_ts, method, endpoint, request_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_security_events_ts
+        ON security_events (event_ts)
+        """,
+        # Day bucketing by integer division, indexable as an expression
+        """
+        CREATE INDEX IF NOT EXISTS idx_security_events_day_ts
+        ON security_events (event_ts / 86400000)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_blocked_users_ts
+        ON blocked_users (block_ts)
+        """,
+    ]),
+
+    # Append-only feed of session blocks read by every worker process
+    (5, "cross-process block log", [
+        """
+        CREATE TABLE IF NOT EXISTS block_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            block_ts INTEGER
+        )
+        """,
+    ]),
+
+    (6, "user blocks in block log", [
+        "ALTER TABLE block_log ADD COLUMN username TEXT",
+    ]),
+
+    # The action split and rule heatmap aggregate every event anyway; these
+    # indexes only turned their full scans into full index scans
+    (7, "drop dashboard-only indexes", [
+        "DROP INDEX IF EXISTS idx_security_events_action",
+        "DROP INDEX IF EXISTS idx_security_events_rules",
+    ]),
+
+    # Superseded by first/last_request_ts in migration 4 and no longer read
+    (8, "drop REAL request-time columns", [
+        _drop_request_at_columns,
+    ]),
+]
+
+# Every query on a hot path (app.py, admin.py, agent/) with sample params.
+# The strings are the ones the callers execute (agent/queries.py).
+# check_query_plans() fails if any of them scans a table or an index.
+HOT_QUERIES = {
+    "app.login": (queries.LOGIN_QUERY, ("u", "p")),
+    "app.login.failed": (queries.LOGIN_FAILED_QUERY, ("s", "u", "ip", "ua", "t", 0)),
+    "app.login.existing": (queries.SESSION_EXISTS_QUERY, ("s",)),
+    "app.login.update": (queries.LOGIN_UPDATE_SESSION_QUERY, (1, "u", "ip", "ua", "t", 0, "s")),
+    "app.login.insert": (queries.LOGIN_INSERT_SESSION_QUERY, ("s", 1, "u", "ip", "ua", "t", 0)),
+    "app.logout.session": (queries.LOGOUT_SESSION_QUERY, ("s",)),
+    "app.logout.update": (queries.LOGOUT_UPDATE_QUERY, ("t", 0, 0, 0.0, 0.0, "s")),
+    "session_cache.load": (queries.SESSION_STATE_QUERY, ("s",)),
+    "session_cache.flush": (queries.SESSION_FLUSH_QUERY, (0,) * 9 + ("s", 0)),
+    "session_cache.mark_blocked": (queries.SESSION_BLOCK_QUERY, ("s",)),
+    "block_broadcast.attach": (queries.BLOCK_LOG_LAST_SEQ_QUERY, ()),
+    "block_broadcast.publish": (queries.BLOCK_LOG_PUBLISH_QUERY, ("s", "u", 0)),
+    "block_broadcast.poll": (queries.BLOCK_LOG_POLL_QUERY, (0,)),
+    "log_writer.request_logs": (queries.REQUEST_LOG_INSERT_QUERY, ("s", "/", "t", "GET", 200, 0)),
+    "log_writer.security_events": (queries.SECURITY_EVENT_INSERT_QUERY, ("s", "u", 0.0, 0.0, "", "ALLOW", "t", 0)),
+    "memory.get_session_state": (queries.SESSION_ROW_QUERY, ("s",)),
+    "memory.get_session_states": (
+        queries.SESSION_STATES_QUERY.format(placeholders=", ".join("?" * 8)), ("s",) * 8),
+    "memory.blocked_users": (queries.BLOCKED_USER_INSERT_QUERY, ("u", "r", "t", "s", 0)),
+    "memory.store_event.username": (queries.SESSION_USERNAME_QUERY, ("s",)),
+    "memory.block_user": (queries.BLOCK_USER_QUERY, ("u",)),
+    "blocklist.reconcile": (queries.BLOCKED_USERNAMES_QUERY, ()),
+    "admin.login": (queries.ADMIN_LOGIN_QUERY, ("u", "p")),
+    "admin.total_sessions": (queries.TOTAL_SESSIONS_QUERY, ()),
+    "admin.total_attacks": (queries.TOTAL_ATTACKS_QUERY, ()),
+    "admin.total_blocked": (queries.TOTAL_BLOCKED_QUERY, ()),
+    "admin.active_sessions": (queries.ACTIVE_SESSIONS_QUERY, ()),
+    "admin.attack_trend": (queries.ATTACK_TREND_QUERY, ()),
+    "admin.action_dist": (queries.ACTION_DIST_QUERY, ()),
+    "admin.attacks": (queries.ATTACKS_QUERY, ()),
+    "admin.blocked_users": (queries.BLOCKED_USERS_QUERY, ()),
+    "admin.rules_heatmap": (queries.RULES_HEATMAP_QUERY, ()),
+    "admin.session_list": (queries.SESSION_LIST_QUERY, ()),
+    "admin.session_replay": (queries.SESSION_REPLAY_QUERY, ("s",)),
+    "admin.export_events": (queries.EXPORT_EVENTS_QUERY, ()),
+}
+
+# Queries that read a whole table by design: the blocklist reload and the
+# admin dashboard, listings and export.  Any other SCAN is an error.
+FULL_SCAN_ALLOWED = {
+    "blocklist.reconcile",
+    "admin.total_sessions",
+    "admin.total_attacks",
+    "admin.total_blocked",
+    "admin.attack_trend",
+    "admin.action_dist",
+    "admin.attacks",
+    "admin.blocked_users",
+    "admin.rules_heatmap",
+    "admin.session_list",
+    "admin.export_events",
+}
+
+
+def current_version(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn=None):
+    """Apply every pending migration in order; returns the new version"""
+    if conn is None:
+        with pooled_connection() as conn:
+            return migrate(conn)
+
+    version = current_version(conn)
+
+    for number, name, statements in MIGRATIONS:
+        if number <= version:
+            continue
+
+        conn.execute("BEGIN")
+        try:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (number, name)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        print(f"📦 Applied migration {number}: {name}")
+        version = number
+
+    return version
+
+
+def full_scans(conn=None):
+    """
+    Return {query_name: plan_detail} for hot queries that scan a table or
+    a whole index, other than those in FULL_SCAN_ALLOWED
+    """
+    if conn is None:
+        with pooled_connection() as conn:
+            return full_scans(conn)
+
+    offenders = {}
+
+    for name, (sql, params) in HOT_QUERIES.items():
+        if name in FULL_SCAN_ALLOWED:
+            continue
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+            detail = row[-1]
+            if detail.startswith("SCAN"):
+                offenders[name] = detail
+
+    return offenders
+
+
+def check_query_plans(conn=None):
+    """Raise if any hot query falls back to a full table scan"""
+    offenders = full_scans(conn)
+    if offenders:
+        lines = "\n".join(f"  {name}: {detail}" for name, detail in offenders.items())
+        raise RuntimeError(f"Hot queries that scan:\n{lines}")
+
+
+if __name__ == "__main__":
+    conn = get_connection()
+    print(f"✅ Schema at version {migrate(conn)}")
+    try:
+        check_query_plans(conn)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {len(HOT_QUERIES) - len(FULL_SCAN_ALLOWED)} hot queries searched by index, "
+          f"{len(FULL_SCAN_ALLOWED)} allowed to scan")
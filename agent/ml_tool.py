@@ -1,20 +1,26 @@
-import joblib
 import numpy as np
-import pandas as pd
 import os
+import threading
+import time
 
-MODEL_PATH = "models/sentinel_rf_model.pkl"
+from agent.model_manager import ModelManager
+from agent.tree_ensemble import FlatForest
 
-model = joblib.load(MODEL_PATH)
-FEATURE_COLUMNS = model.feature_names_in_
+MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "models", "sentinel_rf_model.pkl"
+)
 
-def ml_predict(session):
+# Trees split on float32 features; filling a float32 buffer directly
+# skips the float64 -> float32 copy sklearn would otherwise make
+FEATURE_DTYPE = np.float32
+
+def build_feature_map(session):
     """
     Build a 15-feature vector from session-level behavior.
     Missing packet-level features are safely approximated or zero-filled.
     """
-
-    feature_map = {
+    return {
         "Bwd Header Length": session["total_requests"] * 20,
         "Fwd Packet Length Mean": session["total_requests"] * 30,
         "Fwd Packet Length Max": session["total_requests"] * 50,
@@ -31,8 +37,184 @@ def ml_predict(session):
         "Bwd Packet Length Max": session["total_requests"] * 40,
         "Fwd PSH Flags": 0,
     }
-    X = pd.DataFrame([[feature_map[f] for f in FEATURE_COLUMNS]],
-                     columns=FEATURE_COLUMNS)
+
+
+# ---------- fast path ----------
+# Every feature is a multiple of one session field (or a constant), so the
+# vector is base values [total, interval, rate, rate², 1] times a fixed
+# weight matrix laid out in the model's feature_names_in_ order.
+
+_BASES = ("total_requests", "avg_request_interval", "max_request_rate", "rate_squared", "constant")
+
+_FEATURE_WEIGHTS = {
+    "Bwd Header Length": ("total_requests", 20),
+    "Fwd Packet Length Mean": ("total_requests", 30),
+    "Fwd Packet Length Max": ("total_requests", 50),
+    "Packet Length Max": ("total_requests", 50),
+    "Fwd Packets Length Total": ("total_requests", 100),
+    "Flow IAT Min": ("avg_request_interval", 1),
+    "Packet Length Mean": ("total_requests", 25),
+    "Fwd Packet Length Std": ("max_request_rate", 1),
+    "Bwd Packet Length Mean": ("total_requests", 15),
+    "Fwd Header Length": ("total_requests", 10),
+    "Packet Length Variance": ("rate_squared", 1),
+    "Init Bwd Win Bytes": ("constant", 0),
+    "Init Fwd Win Bytes": ("constant", 0),
+    "Bwd Packet Length Max": ("total_requests", 40),
+    "Fwd PSH Flags": ("constant", 0),
+}
+
+
+def _compile_weights(columns):
+    weights = np.zeros((len(_BASES), len(columns)))
+    for j, name in enumerate(columns):
+        base, weight = _FEATURE_WEIGHTS[name]
+        weights[_BASES.index(base), j] = weight
+    return weights
+
+
+# Session fields the model's features are built from
+ML_INPUT_FIELDS = ("total_requests", "avg_request_interval", "max_request_rate")
+
+_local = threading.local()
+
+
+def _base_values(session):
+    rate = session["max_request_rate"] or 0
+    return (
+        session["total_requests"],
+        session["avg_request_interval"] or 0,
+        rate,
+        rate ** 2,
+        1,
+    )
+
+
+# Above this many rows sklearn's compiled per-tree walk beats the
+# lock-step NumPy walk (see `python -m agent.tree_ensemble`)
+FLAT_MAX_BATCH = 128
+
+
+class ForestScorer:
+    """Everything derived from the loaded RandomForest that scoring needs"""
+
+    def __init__(self, model):
+        self.model = model
+        self.feature_columns = model.feature_names_in_
+        self.weights = _compile_weights(self.feature_columns)
+        self.trees = [estimator.tree_ for estimator in model.estimators_]
+        self.flat = FlatForest.from_model(model)
+
+    def feature_vector(self, session):
+        """
+        Fill this thread's 1 x n_features input buffer for one session.
+        The returned array is reused by the next call on the same thread.
+        """
+        buffers = getattr(_local, "buffers", None)
+        if buffers is None or buffers[0].shape[0] != len(self.feature_columns):
+            # float64 dot product, float32 model input
+            buffers = _local.buffers = (
+                np.empty(len(self.feature_columns)),
+                np.empty((1, len(self.feature_columns)), dtype=FEATURE_DTYPE),
+            )
+        product, X = buffers
+        np.dot(_base_values(session), self.weights, out=product)
+        X[0] = product
+        return X
+
+    def feature_matrix(self, sessions):
+        bases = np.array([_base_values(s) for s in sessions], dtype=float)
+        return (bases @ self.weights).astype(FEATURE_DTYPE)
+
+    def proba(self, X):
+        """
+        RandomForestClassifier.predict_proba without the per-call checks:
+        X must already be C-contiguous float32 in feature_columns order.
+        Leaf class fractions are summed tree by tree in estimator order,
+        as sklearn does, so results are bit-identical.
+        """
+        if X.shape[0] <= FLAT_MAX_BATCH:
+            return self.flat.predict_proba(X)
+
+        n_classes = self.model.n_classes_
+        proba = np.zeros((X.shape[0], n_classes))
+        for tree in self.trees:
+            proba += tree.predict(X)[:, :n_classes]
+        proba /= len(self.trees)
+        return proba
+
+
+def _warm_up(scorer):
+    """One single-row and one batch inference so the first detection is not the slow one"""
+    sample = {"total_requests": 50, "avg_request_interval": 0.2, "max_request_rate": 5.0}
+    scorer.proba(scorer.feature_vector(sample))
+    scorer.proba(scorer.feature_matrix([sample] * 8))
+
+
+# Loaded off the request path: app start calls model_manager.start()
+model_manager = ModelManager(MODEL_PATH, build=ForestScorer, warmup=_warm_up)
+
+
+def ml_predict(session):
+    scorer = model_manager.get()
+    return scorer.proba(scorer.feature_vector(session))[0, 1]
+
+
+def ml_predict_batch(sessions):
+    """Score many sessions with a single pass over the forest"""
+    scorer = model_manager.get()
+    return scorer.proba(scorer.feature_matrix(sessions))[:, 1]
+
+
+# ---------- reference path ----------
+
+def ml_predict_dataframe(session):
+    """Original pandas path, kept as the reference for check_fast_path"""
+    import pandas as pd
+
+    model = model_manager.get().model
+    feature_map = build_feature_map(session)
+    X = pd.DataFrame([[feature_map[f] for f in model.feature_names_in_]],
+                     columns=model.feature_names_in_)
 
     prob = model.predict_proba(X)[0][1]
-    return prob
\ No newline at end of file
+    return prob
+
+
+def check_fast_path(sessions, tolerance=1e-12):
+    """
+    Compare ml_predict / ml_predict_batch against the DataFrame path.
+    Returns the largest absolute difference; raises if it exceeds tolerance.
+    """
+    expected = np.array([ml_predict_dataframe(s) for s in sessions])
+    single = np.array([ml_predict(s) for s in sessions])
+    batch = ml_predict_batch(sessions)
+
+    worst = max(np.abs(single - expected).max(), np.abs(batch - expected).max())
+    if worst > tolerance:
+        raise AssertionError(f"ML fast path diverges from reference by {worst}")
+    return worst
+
+
+def _sample_sessions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "total_requests": int(rng.integers(0, 300)),
+            "avg_request_interval": rng.choice([None, float(rng.exponential(0.5))]),
+            "max_request_rate": rng.choice([None, float(rng.exponential(5))]),
+        }
+        for _ in range(n)
+    ]
+
+
+if __name__ == "__main__":
+    sessions = _sample_sessions(500)
+    print(f"✅ Parity OK (max diff {check_fast_path(sessions):.2e})")
+
+    for name, fn in (("DataFrame", ml_predict_dataframe), ("NumPy", ml_predict)):
+        start = time.perf_counter()
+        for s in sessions:
+            fn(s)
+        per_call = (time.perf_counter() - start) / len(sessions) * 1e6
+        print(f"⏱️ {name:<9} {per_call:8.1f} µs/call")
@@ -0,0 +1,107 @@
+import threading
+from time import perf_counter
+
+import joblib
+
+MODEL_WAIT_TIMEOUT = 30   # seconds a caller waits for the model before giving up
+
+
+class ModelManager:
+    """
+    Owns one joblib model artifact for the whole process.
+    load() reads it once, so workers forked after loading share the built
+    arrays copy-on-write; build() turns the raw estimator into whatever
+    the scorer needs; warmup() runs a throwaway
+    inference so imports, allocations and caches are hot before the
+    first real request.  start() does all of this on a background thread
+    and `ready` tells the server when it may take detection traffic.
+    Whichever of start() and load() comes first does the one load; the
+    others wait for it.
+    """
+
+    def __init__(self, path, build=None, warmup=None):
+        self.path = path
+        self._build = build or (lambda model: model)
+        self._warmup = warmup
+
+        self._value = None
+        self._error = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._claimed = False
+        self._thread = None
+
+        self.state = "idle"
+        self.load_ms = None
+        self.warmup_ms = None
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        """Load and warm up in the background (no-op once started)"""
+        if self._claim():
+            self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+            self._thread.start()
+
+    def load(self):
+        """Load on the calling thread, or wait for the load in progress; returns the built model"""
+        if self._claim():
+            self._load()
+        return self.get(timeout=None)
+
+    def _claim(self):
+        """True for the one caller that gets to load"""
+        with self._lock:
+            if self._claimed:
+                return False
+            self._claimed = True
+            return True
+
+    def _load(self):
+        try:
+            self.state = "loading"
+            start = perf_counter()
+            value = self._build(joblib.load(self.path))
+            self.load_ms = (perf_counter() - start) * 1000
+
+            self.state = "warming"
+            start = perf_counter()
+            if self._warmup:
+                self._warmup(value)
+            self.warmup_ms = (perf_counter() - start) * 1000
+
+            self._value = value
+            self.state = "ready"
+            print(f"🤖 Model ready: {self.path} "
+                  f"(load {self.load_ms:.0f} ms, warm-up {self.warmup_ms:.0f} ms)")
+        except Exception as e:
+            self._error = e
+            self.state = "failed"
+            print(f"❌ ERROR LOADING MODEL {self.path}: {e}")
+        finally:
+            self._ready.set()
+
+    # ---------- consumers ----------
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def get(self, timeout=MODEL_WAIT_TIMEOUT):
+        """The built model; waits for a load in progress and raises if it failed"""
+        if not self._ready.is_set():
+            self.start()
+            if not self._ready.wait(timeout):
+                raise TimeoutError(f"model {self.path} not loaded after {timeout}s")
+        if self._error is not None:
+            raise RuntimeError(f"model {self.path} failed to load: {self._error}")
+        return self._value
+
+    def status(self):
+        return {
+            "state": self.state,
+            "path": self.path,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "error": str(self._error) if self._error else None,
+        }
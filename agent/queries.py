@@ -0,0 +1,216 @@
+"""
+SQL for every query on a hot path.
+
+app.py, admin.py and the agent modules execute these strings, and
+agent/migrations.py checks the plan of the very same strings, so a
+change to a query is checked the moment it is made.
+"""
+
+# ---------- app.py ----------
+
+LOGIN_QUERY = "SELECT * FROM users WHERE username = ? AND password = ?"
+
+# Failed attempt: open the pre-login session or count one more failure
+LOGIN_FAILED_QUERY = """
+    INSERT INTO user_sessions (
+        session_id, username, ip_address, user_agent,
+        login_time, login_ts, failed_logins, is_authenticated
+    )
+    VALUES (?, ?, ?, ?, ?, ?, 1, 0)
+    ON CONFLICT(session_id)
+    DO UPDATE SET failed_logins = failed_logins + 1
+"""
+
+SESSION_EXISTS_QUERY = """
+    SELECT session_id FROM user_sessions WHERE session_id = ?
+"""
+
+LOGIN_UPDATE_SESSION_QUERY = """
+    UPDATE user_sessions
+    SET user_id = ?, username = ?, ip_address = ?,
+        user_agent = ?, login_time = ?, login_ts = ?, is_authenticated = 1
+    WHERE session_id = ?
+"""
+
+LOGIN_INSERT_SESSION_QUERY = """
+    INSERT INTO user_sessions (
+        session_id, user_id, username, ip_address, user_agent,
+        login_time, login_ts, is_authenticated
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+"""
+
+LOGOUT_SESSION_QUERY = """
+    SELECT login_ts, username, total_requests, interval_count,
+           interval_sum, min_request_interval
+    FROM user_sessions
+    WHERE session_id = ?
+"""
+
+LOGOUT_UPDATE_QUERY = """
+    UPDATE user_sessions
+    SET logout_time = ?, logout_ts = ?, session_duration = ?,
+        avg_request_interval = ?, max_request_rate = ?
+    WHERE session_id = ?
+"""
+
+# ---------- admin.py ----------
+
+ADMIN_LOGIN_QUERY = """
+    SELECT * FROM admin_users
+    WHERE username = ? AND password = ?
+"""
+
+TOTAL_SESSIONS_QUERY = "SELECT COUNT(*) FROM user_sessions"
+TOTAL_ATTACKS_QUERY = "SELECT COUNT(*) FROM security_events"
+TOTAL_BLOCKED_QUERY = "SELECT COUNT(*) FROM blocked_users"
+
+ACTIVE_SESSIONS_QUERY = """
+    SELECT COUNT(*) FROM user_sessions
+    WHERE logout_time IS NULL
+"""
+
+# Integer day buckets, served by idx_security_events_day_ts
+ATTACK_TREND_QUERY = """
+    SELECT date((event_ts / 86400000) * 86400, 'unixepoch') as day,
+           COUNT(*) as count
+    FROM security_events
+    WHERE event_ts IS NOT NULL
+    GROUP BY event_ts / 86400000
+    ORDER BY event_ts / 86400000
+"""
+
+ACTION_DIST_QUERY = """
+    SELECT action_taken, COUNT(*) as count
+    FROM security_events
+    GROUP BY action_taken
+"""
+
+ATTACKS_QUERY = """
+    SELECT * FROM security_events
+    ORDER BY event_ts DESC
+"""
+
+BLOCKED_USERS_QUERY = """
+    SELECT * FROM blocked_users
+    ORDER BY block_ts DESC
+"""
+
+RULES_HEATMAP_QUERY = """
+    SELECT triggered_rules, COUNT(*) as count
+    FROM security_events
+    WHERE triggered_rules IS NOT NULL
+"""
+
+SESSION_LIST_QUERY = """
+    SELECT DISTINCT session_id
+    FROM request_logs
+    ORDER BY session_id DESC
+"""
+
+SESSION_REPLAY_QUERY = """
+    SELECT request_time, method, endpoint
+    FROM request_logs
+    WHERE session_id = ?
+    ORDER BY request_ts
+"""
+
+EXPORT_EVENTS_QUERY = "SELECT * FROM security_events"
+
+# ---------- agent/ ----------
+
+SESSION_STATE_QUERY = """
+    SELECT username, total_requests, failed_logins, is_blocked,
+           avg_request_interval, max_request_rate, first_request_ts,
+           last_request_ts, interval_count, interval_sum,
+           min_request_interval, interval_m2
+    FROM user_sessions
+    WHERE session_id = ?
+"""
+
+# Skips rows a worker holding a newer count has already written
+SESSION_FLUSH_QUERY = """
+    UPDATE user_sessions
+    SET total_requests = ?,
+        avg_request_interval = ?,
+        max_request_rate = ?,
+        first_request_ts = ?,
+        last_request_ts = ?,
+        interval_count = ?,
+        interval_sum = ?,
+        min_request_interval = ?,
+        interval_m2 = ?
+    WHERE session_id = ?
+      AND COALESCE(total_requests, 0) <= ?
+"""
+
+SESSION_BLOCK_QUERY = """
+    UPDATE user_sessions
+    SET is_blocked = 1
+    WHERE session_id = ?
+"""
+
+BLOCK_LOG_LAST_SEQ_QUERY = "SELECT MAX(seq) FROM block_log"
+
+BLOCK_LOG_PUBLISH_QUERY = """
+    INSERT INTO block_log (session_id, username, block_ts)
+    VALUES (?, ?, ?)
+"""
+
+BLOCK_LOG_POLL_QUERY = """
+    SELECT seq, session_id, username
+    FROM block_log
+    WHERE seq > ?
+    ORDER BY seq
+"""
+
+SESSION_ROW_QUERY = """
+    SELECT *
+    FROM user_sessions
+    WHERE session_id = ?
+"""
+
+# .format(placeholders=...) with one "?" per session id
+SESSION_STATES_QUERY = """
+    SELECT *
+    FROM user_sessions
+    WHERE session_id IN ({placeholders})
+"""
+
+SESSION_USERNAME_QUERY = """
+    SELECT username FROM user_sessions WHERE session_id = ?
+"""
+
+BLOCKED_USER_INSERT_QUERY = """
+    INSERT OR REPLACE INTO blocked_users (
+        username,
+        block_reason,
+        block_time,
+        session_id,
+        block_ts
+    )
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+BLOCK_USER_QUERY = """
+    UPDATE users
+    SET is_blocked = 1
+    WHERE username = ?
+"""
+
+BLOCKED_USERNAMES_QUERY = "SELECT username FROM blocked_users"
+
+REQUEST_LOG_INSERT_QUERY = """
+    INSERT INTO request_logs (
+        session_id, endpoint, request_time, method, response_code, request_ts
+    )
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SECURITY_EVENT_INSERT_QUERY = """
+    INSERT INTO security_events (
+        session_id, username, risk_score, ml_score,
+        triggered_rules, action_taken, event_time, event_ts
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
@@ -0,0 +1,136 @@
+from collections import deque
+
+WINDOW_SIZE = 10
+
+
+class RateWindow:
+    """
+    Sliding window over the last WINDOW_SIZE request timestamps.
+    Timestamps come from time.monotonic(); the ring buffer keeps a
+    running interval sum and a monotonic deque of intervals, so rate,
+    mean interval and min interval are all O(1) per request.
+    """
+
+    __slots__ = ("size", "_times", "_head", "count", "_interval_sum", "_mins", "_seq")
+
+    def __init__(self, size=WINDOW_SIZE):
+        self.size = size
+        self._times = [0.0] * size
+        self.clear()
+
+    def clear(self):
+        self._head = 0            # slot the next timestamp goes into
+        self.count = 0            # timestamps currently in the window
+        self._interval_sum = 0.0
+        self._mins = deque()      # (seq, interval), intervals increasing
+        self._seq = 0             # sequence number of the newest interval
+
+    def record(self, ts):
+        size = self.size
+
+        if self.count:
+            newest = self._times[(self._head - 1) % size]
+            interval = ts - newest
+
+            if self.count == size:
+                # The oldest interval (slot 0 -> slot 1) leaves the window
+                oldest = self._times[self._head]
+                second = self._times[(self._head + 1) % size]
+                self._interval_sum -= second - oldest
+
+            self._interval_sum += interval
+            self._seq += 1
+
+            while self._mins and self._mins[-1][1] >= interval:
+                self._mins.pop()
+            self._mins.append((self._seq, interval))
+
+            # Keep only the newest size-1 intervals
+            first_valid = self._seq - (size - 2)
+            while self._mins[0][0] < first_valid:
+                self._mins.popleft()
+
+        self._times[self._head] = ts
+        self._head = (self._head + 1) % size
+        if self.count < size:
+            self.count += 1
+
+    @property
+    def span(self):
+        if self.count < 2:
+            return 0.0
+        newest = self._times[(self._head - 1) % self.size]
+        oldest = self._times[(self._head - self.count) % self.size]
+        return newest - oldest
+
+    @property
+    def rate(self):
+        """Requests per second across the window (999 for a zero span)"""
+        span = self.span
+        return self.count / span if span > 0 else 999
+
+    @property
+    def mean_interval(self):
+        if self.count < 2:
+            return 0
+        return self._interval_sum / (self.count - 1)
+
+    @property
+    def min_interval(self):
+        return self._mins[0][1] if self._mins else None
+
+
+class SessionAggregate:
+    """
+    Whole-session request statistics, updated as requests arrive.
+    Timestamps are wall-clock epoch seconds so they can be persisted;
+    interval variance uses Welford's online update.
+    """
+
+    __slots__ = (
+        "first_ts", "last_ts", "interval_count", "interval_sum",
+        "min_interval", "interval_m2"
+    )
+
+    def __init__(self, first_ts=None, last_ts=None, interval_count=0,
+                 interval_sum=0.0, min_interval=None, interval_m2=0.0):
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+        self.interval_count = interval_count or 0
+        self.interval_sum = interval_sum or 0.0
+        self.min_interval = min_interval
+        self.interval_m2 = interval_m2 or 0.0
+
+    def record(self, ts):
+        if self.last_ts is None:
+            self.first_ts = ts
+        else:
+            interval = ts - self.last_ts
+            old_mean = self.mean_interval or 0.0
+
+            self.interval_count += 1
+            self.interval_sum += interval
+            if self.min_interval is None or interval < self.min_interval:
+                self.min_interval = interval
+
+            self.interval_m2 += (interval - old_mean) * (interval - self.mean_interval)
+
+        self.last_ts = ts
+
+    @property
+    def mean_interval(self):
+        if not self.interval_count:
+            return None
+        return self.interval_sum / self.interval_count
+
+    @property
+    def interval_variance(self):
+        if self.interval_count < 2:
+            return None
+        return self.interval_m2 / (self.interval_count - 1)
+
+    def max_rate(self, total_requests):
+        """1 / shortest interval, or the request count if two requests coincided"""
+        if self.min_interval is None:
+            return None
+        return 1 / self.min_interval if self.min_interval > 0 else total_requests
@@ -0,0 +1,229 @@
+"""
+Declarative detection rules, compiled once and hot-reloaded.
+
+agent/rules.json holds every threshold the detectors use:
+
+    rulesets   named lists of rules; each rule has
+                 when    [[field, op, value], ...]   all must hold
+                 truthy  [field, ...]                must be non-null and non-zero
+                 group   rules sharing a group are exclusive, first match wins
+                 risk    added to the rule risk when the rule fires
+                 label   str.format template over the record's fields
+    decisions  the verdict table: first row whose min_rule_risk and
+               min_ml_score are both met wins, else default_decision
+
+A null field never satisfies a condition.  Each ruleset compiles to a
+scalar evaluator for one record dict and a columnar one that scores
+many records with NumPy masks; both return identical risks and labels.
+The file is re-read when its mtime changes, no restart needed.
+"""
+import json
+import operator
+import os
+import string
+import threading
+import time
+
+import numpy as np
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+RELOAD_CHECK_INTERVAL = 2.0   # seconds between mtime checks
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+}
+
+
+class Rule:
+    __slots__ = ("name", "conditions", "truthy", "group", "risk", "label", "label_fields")
+
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.conditions = [
+            (field, OPERATORS[op], value) for field, op, value in spec.get("when", [])
+        ]
+        self.truthy = list(spec.get("truthy", []))
+        self.group = spec.get("group")
+        self.risk = spec.get("risk", 0)
+        self.label = spec["label"]
+        self.label_fields = [
+            field for _, field, _, _ in string.Formatter().parse(self.label) if field
+        ]
+
+    def matches(self, record):
+        for field in self.truthy:
+            if not record[field]:
+                return False
+        for field, compare, value in self.conditions:
+            actual = record[field]
+            if actual is None or not compare(actual, value):
+                return False
+        return True
+
+    def mask(self, columns, n_rows):
+        fired = np.ones(n_rows, dtype=bool)
+        for field in self.truthy:
+            column = columns[field]
+            fired &= (column != 0) & ~np.isnan(column)
+        for field, compare, value in self.conditions:
+            # NaN (null) compares False, like a None field in matches()
+            fired &= compare(columns[field], value)
+        return fired
+
+
+class RuleSet:
+    """One compiled list of rules"""
+
+    def __init__(self, name, specs):
+        self.name = name
+        self.rules = [Rule(spec) for spec in specs]
+        self.fields = sorted({
+            field
+            for rule in self.rules
+            for field in rule.truthy + [c[0] for c in rule.conditions] + rule.label_fields
+        })
+
+    def evaluate(self, record):
+        """Score one record dict; returns (risk, triggered labels)"""
+        risk = 0
+        triggered = []
+        taken = set()
+
+        for rule in self.rules:
+            if rule.group is not None and rule.group in taken:
+                continue
+            if rule.matches(record):
+                risk += rule.risk
+                triggered.append(rule.label.format(**record))
+                if rule.group is not None:
+                    taken.add(rule.group)
+
+        return risk, triggered
+
+    def columns(self, records):
+        """Float columns (null -> NaN) for every field the rules read"""
+        return {
+            field: np.array(
+                [np.nan if r[field] is None else r[field] for r in records], dtype=float
+            )
+            for field in self.fields
+        }
+
+    def evaluate_columns(self, columns, n_rows):
+        """
+        Vectorized evaluate() over columnar input.
+        Labels are only formatted for the rows a rule fired on.
+        Returns (risk array, list of triggered-label lists).
+        """
+        risk = np.zeros(n_rows, dtype=int)
+        triggered = [[] for _ in range(n_rows)]
+        taken = {}
+
+        for rule in self.rules:
+            if n_rows == 0:
+                break
+            fired = rule.mask(columns, n_rows)
+            if rule.group is not None:
+                group_taken = taken.setdefault(rule.group, np.zeros(n_rows, dtype=bool))
+                fired &= ~group_taken
+                group_taken |= fired
+
+            risk += rule.risk * fired
+            for i in np.flatnonzero(fired):
+                triggered[i].append(rule.label.format(
+                    **{field: columns[field][i] for field in rule.label_fields}
+                ))
+
+        return risk, triggered
+
+    def evaluate_batch(self, records):
+        return self.evaluate_columns(self.columns(records), len(records))
+
+
+class RuleEngine:
+    """
+    Loads and compiles rules.json, re-reading it when its mtime changes.
+    A file that fails to parse or compile is reported and the previous
+    rules stay in force.
+    """
+
+    def __init__(self, path=RULES_PATH, check_interval=RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+        self._rulesets = {}
+        self._decisions = []
+        self._default = None
+
+        self.reload()
+
+    def reload(self):
+        """Compile the rules file now; returns True if it was (re)loaded"""
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                if self.version == 0:
+                    raise
+                return False
+
+            try:
+                with open(self.path) as f:
+                    spec = json.load(f)
+
+                rulesets = {
+                    name: RuleSet(name, rules) for name, rules in spec["rulesets"].items()
+                }
+                decisions = [
+                    (row["action"], row["min_rule_risk"], row["min_ml_score"], row["reason"])
+                    for row in spec["decisions"]
+                ]
+                default = (spec["default_decision"]["action"], spec["default_decision"]["reason"])
+            except Exception as e:
+                if self.version == 0:
+                    raise
+                # Remember the bad file so it is reported once, not every check
+                self._mtime = mtime
+                print(f"❌ ERROR RELOADING RULES {self.path}: {e} (keeping previous rules)")
+                return False
+
+            self._rulesets, self._decisions, self._default = rulesets, decisions, default
+            self._mtime = mtime
+            self.version += 1
+
+        if self.version > 1:
+            print(f"🔁 Reloaded detection rules from {self.path} (version {self.version})")
+        return True
+
+    def _check(self):
+        if time.monotonic() < self._next_check:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = self._mtime
+        if mtime != self._mtime:
+            self.reload()
+        else:
+            self._next_check = time.monotonic() + self.check_interval
+
+    def ruleset(self, name):
+        self._check()
+        return self._rulesets[name]
+
+    def decisions(self):
+        """(decision rows, default) as (action, min rule risk, min ML, reason) tuples"""
+        self._check()
+        return self._decisions, self._default
+
+
+engine = RuleEngine()
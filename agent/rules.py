@@ -1,21 +1,33 @@
+from agent.rule_engine import engine
+
+# Thresholds, risks and labels live in agent/rules.json (see rule_engine)
+
+
 def evaluate_rules(state):
-    risk = 0
-    triggered_rules = []
+    return engine.ruleset("legacy").evaluate(state)
+
 
-    if state["failed_logins"] >= 3:
-        risk += 30
-        triggered_rules.append("Multiple failed logins")
+def score_session_rules(session):
+    """
+    Rule half of evaluate_session: cheap, no I/O, no model.
+    Returns (rule_risk, rules_triggered) for a user_sessions-shaped dict.
+    """
+    return engine.ruleset("session").evaluate(session)
 
-    if state["avg_request_interval"] is not None and state["avg_request_interval"] < 0.5:
-        risk += 25
-        triggered_rules.append("Very fast request rate")
 
-    if state["max_request_rate"] is not None and state["max_request_rate"] > 5:
-        risk += 25
-        triggered_rules.append("Burst traffic detected")
+def score_session_rules_batch(sessions):
+    """
+    Vectorized score_session_rules over many sessions.
+    Returns (rule_risk array, list of rules_triggered lists).
+    """
+    return engine.ruleset("session").evaluate_batch(sessions)
 
-    if state["session_duration"] is not None and state["session_duration"] > 3600:
-        risk += 10
-        triggered_rules.append("Abnormally long session")
 
-    return risk, triggered_rules
\ No newline at end of file
+def realtime_reasons(rate, avg_interval, total_requests):
+    """Per-request suspicion checks on the rate window; returns the reasons that fired"""
+    _, reasons = engine.ruleset("realtime").evaluate({
+        "rate": rate,
+        "avg_interval": avg_interval,
+        "total_requests": total_requests,
+    })
+    return reasons
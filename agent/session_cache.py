@@ -0,0 +1,302 @@
+import atexit
+import threading
+import time
+
+from agent.db import pooled_connection
+from agent.queries import SESSION_STATE_QUERY, SESSION_FLUSH_QUERY, SESSION_BLOCK_QUERY
+from agent.rate_tracker import RateWindow, SessionAggregate
+from agent.timeutil import now_ms
+
+FLUSH_INTERVAL = 2.0      # seconds between write-behind flushes
+IDLE_EVICT_AFTER = 900    # drop clean sessions not seen for 15 minutes
+SHARED_SWEEP_INTERVAL = 60.0  # seconds between idle sweeps of the shared table
+
+
+class SessionState:
+    """In-memory copy of the user_sessions fields the request path needs"""
+
+    __slots__ = (
+        "session_id", "username", "total_requests", "failed_logins",
+        "is_blocked", "avg_request_interval", "max_request_rate",
+        "rate_window", "window_seq", "aggregate", "last_escalation", "dirty",
+        "last_seen", "shared"
+    )
+
+    def __init__(self, session_id, row):
+        self.session_id = session_id
+        self.username = row["username"]
+        self.total_requests = row["total_requests"] or 0
+        self.failed_logins = row["failed_logins"] or 0
+        self.is_blocked = row["is_blocked"] or 0
+        self.avg_request_interval = row["avg_request_interval"]
+        self.max_request_rate = row["max_request_rate"]
+        self.rate_window = RateWindow()
+        self.window_seq = 0       # shared timestamps already fed to rate_window
+        self.aggregate = SessionAggregate(
+            _seconds(row["first_request_ts"]), _seconds(row["last_request_ts"]),
+            row["interval_count"], row["interval_sum"],
+            row["min_request_interval"], row["interval_m2"]
+        )
+        self.last_escalation = 0
+        self.dirty = False
+        self.last_seen = time.monotonic()
+        self.shared = False
+
+    def as_dict(self):
+        """user_sessions-shaped view for the rule engine"""
+        return {
+            "username": self.username,
+            "total_requests": self.total_requests,
+            "failed_logins": self.failed_logins,
+            "is_blocked": self.is_blocked,
+            "avg_request_interval": self.avg_request_interval,
+            "max_request_rate": self.max_request_rate,
+        }
+
+
+def _seconds(ts_ms):
+    return ts_ms / 1000 if ts_ms is not None else None
+
+
+def _ms(ts):
+    return round(ts * 1000) if ts is not None else None
+
+
+class SessionStateCache:
+    """
+    Write-behind cache for user_sessions counters.
+    Reads and increments stay in memory; dirty rows are flushed in one
+    batch every FLUSH_INTERVAL seconds (or on demand at logout).
+    Block flags are written through immediately and, when a broadcast
+    is given, announced to (and picked up from) the other workers.
+
+    With pre-fork workers, attach() a SharedSessionTable before forking:
+    counters, aggregates and rate windows then live in shared memory, so
+    every worker sees all of a session's requests and flushes the same
+    absolute values (guarded so an older snapshot never overwrites a
+    newer one).
+    """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, broadcast=None):
+        self.flush_interval = flush_interval
+        self.broadcast = broadcast
+        if broadcast is not None:
+            broadcast.subscribe(self._apply_remote_blocks)
+        self.shared = None
+        self._states = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._next_shared_sweep = 0.0
+
+    def attach(self, shared):
+        """Keep counters in `shared` (a SharedSessionTable); call in the parent before forking"""
+        self.shared = shared
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="session-cache-flush", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self._evict_idle()
+            except Exception as e:
+                print(f"❌ ERROR IN session cache flush: {e}")
+
+    # ---------- reads ----------
+
+    def get(self, session_id):
+        """Return the cached state, loading it from user_sessions on a miss"""
+        self.start()
+        if self.broadcast is not None:
+            self.broadcast.poll()
+
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is not None:
+                state.last_seen = time.monotonic()
+                return state
+
+        with pooled_connection() as conn:
+            row = conn.execute(SESSION_STATE_QUERY, (session_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        state = SessionState(session_id, row)
+        if self.shared is not None:
+            # Another worker may already hold newer counters for this session
+            state.shared = self.shared.adopt(session_id, state, time.monotonic())
+            if not state.shared:
+                print(f"⚠️ Shared session table full; counting {session_id} in this worker only")
+
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep the first copy
+            return self._states.setdefault(session_id, state)
+
+    # ---------- writes ----------
+
+    def increment(self, session_id):
+        """Count one request in memory and feed its rate window; returns the new total"""
+        now = time.monotonic()
+        wall_now = now_ms() / 1000
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is None:
+                return None
+            state.dirty = True
+            if state.shared and self.shared.record(session_id, state, now, wall_now):
+                return state.total_requests
+            state.shared = False
+            state.rate_window.record(now)
+            state.aggregate.record(wall_now)
+            state.total_requests += 1
+            return state.total_requests
+
+    def set_metrics(self, session_id, avg_request_interval, max_request_rate):
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is None:
+                return
+            state.avg_request_interval = avg_request_interval
+            state.max_request_rate = max_request_rate
+            state.dirty = True
+            if state.shared:
+                self.shared.set_metrics(session_id, avg_request_interval, max_request_rate)
+
+    def claim_escalation(self, session_id, state, total_requests, every):
+        """True if this request may escalate to the agent (at most every `every` requests)"""
+        if state.shared:
+            return self.shared.claim_escalation(session_id, total_requests, every)
+        if state.last_escalation and total_requests - state.last_escalation < every:
+            return False
+        state.last_escalation = total_requests
+        return True
+
+    def mark_blocked(self, session_id):
+        """Block flags are never deferred: update memory and the table now"""
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is not None:
+                state.is_blocked = 1
+
+        with pooled_connection() as conn:
+            conn.execute(SESSION_BLOCK_QUERY, (session_id,))
+            conn.commit()
+
+        if self.broadcast is not None:
+            self.broadcast.publish(session_id=session_id)
+
+    def _apply_remote_blocks(self, session_ids, usernames):
+        """Set is_blocked on cached sessions another worker has blocked"""
+        with self._lock:
+            for session_id in session_ids:
+                state = self._states.get(session_id)
+                if state is not None:
+                    state.is_blocked = 1
+
+    # ---------- write-behind ----------
+
+    def _take_dirty(self, session_ids=None):
+        with self._lock:
+            if session_ids is None:
+                states = self._states.values()
+            else:
+                states = [self._states[s] for s in session_ids if s in self._states]
+
+            rows = []
+            for state in states:
+                if state.shared:
+                    # Any worker's requests may have dirtied the shared slot
+                    state.dirty = False
+                    values = self.shared.take_dirty(state.session_id)
+                    if values is None:
+                        continue
+                    (total_requests, avg_request_interval, max_request_rate, first_ts,
+                     last_ts, interval_count, interval_sum, min_interval, interval_m2) = values
+                    rows.append((
+                        total_requests, avg_request_interval, max_request_rate,
+                        _ms(first_ts), _ms(last_ts), interval_count, interval_sum,
+                        min_interval, interval_m2, state.session_id, total_requests
+                    ))
+                elif state.dirty:
+                    state.dirty = False
+                    aggregate = state.aggregate
+                    rows.append((
+                        state.total_requests,
+                        state.avg_request_interval,
+                        state.max_request_rate,
+                        _ms(aggregate.first_ts),
+                        _ms(aggregate.last_ts),
+                        aggregate.interval_count,
+                        aggregate.interval_sum,
+                        aggregate.min_interval,
+                        aggregate.interval_m2,
+                        state.session_id,
+                        state.total_requests
+                    ))
+            return rows
+
+    def flush(self, session_ids=None):
+        """Write dirty counters to user_sessions in a single transaction"""
+        rows = self._take_dirty(session_ids)
+        if not rows:
+            return 0
+
+        with pooled_connection() as conn:
+            try:
+                conn.executemany(SESSION_FLUSH_QUERY, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                self._mark_dirty(row[-2] for row in rows)
+                raise
+
+        return len(rows)
+
+    def flush_session(self, session_id):
+        return self.flush([session_id])
+
+    def evict(self, session_id):
+        """Flush and forget a session (logout)"""
+        self.flush_session(session_id)
+        with self._lock:
+            state = self._states.pop(session_id, None)
+        if state is not None and state.shared:
+            self.shared.release(session_id)
+
+    def _mark_dirty(self, session_ids):
+        with self._lock:
+            for session_id in session_ids:
+                state = self._states.get(session_id)
+                if state is not None:
+                    state.dirty = True
+                    if state.shared:
+                        self.shared.mark_dirty(session_id)
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - IDLE_EVICT_AFTER
+        with self._lock:
+            idle = [
+                s for s, state in self._states.items()
+                if not state.dirty and state.last_seen < cutoff
+            ]
+            for session_id in idle:
+                del self._states[session_id]
+
+        if self.shared is not None and time.monotonic() >= self._next_shared_sweep:
+            self._next_shared_sweep = time.monotonic() + SHARED_SWEEP_INTERVAL
+            self.shared.release_idle(cutoff)
@@ -0,0 +1,260 @@
+import hashlib
+import math
+import multiprocessing
+
+from agent.rate_tracker import RateWindow, SessionAggregate, WINDOW_SIZE
+
+SHARED_SLOTS = 16384   # sessions tracked at once across all workers
+LOCK_STRIPES = 64
+
+# Per-slot layout of the float64 array
+TOTAL, FIRST_TS, LAST_TS, I_COUNT, I_SUM, I_MIN, I_M2, AVG_INTERVAL, MAX_RATE, \
+    LAST_ESCALATION, DIRTY, LAST_SEEN, W_SEQ = range(13)
+W_TIMES = 13            # ring of WINDOW_SIZE monotonic timestamps; number n is at n % WINDOW_SIZE
+
+EMPTY = 0
+TOMBSTONE = -1
+
+NAN = float("nan")
+
+
+def _key(session_id):
+    key = int.from_bytes(hashlib.blake2b(session_id.encode(), digest_size=8).digest(), "little", signed=True)
+    return key if key not in (EMPTY, TOMBSTONE) else 1
+
+
+def _opt(value):
+    return None if math.isnan(value) else value
+
+
+def _nan(value):
+    return NAN if value is None else value
+
+
+class SharedSessionTable:
+    """
+    Session counters, running aggregates and rate windows in shared memory.
+
+    With pre-fork workers every process used to keep its own copy, so each
+    saw only its share of a session's requests and the last one to flush
+    overwrote the others.  This table is created in the parent before the
+    fork; every worker records requests into the same slot (open
+    addressing on a hash of the session id, one lock per stripe of
+    slots), so the counts, intervals and rate window are global.
+    """
+
+    def __init__(self, slots=SHARED_SLOTS, window=WINDOW_SIZE, stripes=LOCK_STRIPES):
+        context = multiprocessing.get_context("fork")
+        self.slots = slots
+        self.window = window
+        self.width = W_TIMES + window
+        self._keys = context.RawArray("q", slots)
+        self._values = context.RawArray("d", slots * self.width)
+        self._locks = [context.Lock() for _ in range(stripes)]
+
+    # ---------- slots ----------
+
+    def _lock(self, key):
+        return self._locks[key % len(self._locks)]
+
+    def _find(self, key, insert=False):
+        """Slot index holding key; with insert, claim a free one. Caller holds the lock."""
+        keys = self._keys
+        start = key % self.slots
+        free = None
+        for probe in range(self.slots):
+            slot = (start + probe) % self.slots
+            current = keys[slot]
+            if current == key:
+                return slot
+            if current == EMPTY:
+                if not insert:
+                    return None
+                return slot if free is None else free
+            if current == TOMBSTONE and free is None:
+                free = slot
+        return free if insert else None
+
+    def adopt(self, session_id, state, now):
+        """
+        Share `state` (just loaded from user_sessions): a worker that already
+        holds the session keeps the newer shared values, otherwise the slot
+        is filled from the row.  Returns False when the table is full.
+        """
+        key = _key(session_id)
+        # Probing crosses stripes, so claiming a slot takes every lock
+        # in a fixed order; loads are rare next to record()
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            slot = self._find(key, insert=True)
+            if slot is None:
+                return False
+            base = slot * self.width
+            values = self._values
+            if self._keys[slot] != key:
+                aggregate = state.aggregate
+                values[base + TOTAL] = state.total_requests
+                values[base + FIRST_TS] = _nan(aggregate.first_ts)
+                values[base + LAST_TS] = _nan(aggregate.last_ts)
+                values[base + I_COUNT] = aggregate.interval_count
+                values[base + I_SUM] = aggregate.interval_sum
+                values[base + I_MIN] = _nan(aggregate.min_interval)
+                values[base + I_M2] = aggregate.interval_m2
+                values[base + AVG_INTERVAL] = _nan(state.avg_request_interval)
+                values[base + MAX_RATE] = _nan(state.max_request_rate)
+                values[base + LAST_ESCALATION] = 0
+                values[base + DIRTY] = 0
+                values[base + W_SEQ] = 0
+                self._keys[slot] = key
+            values[base + LAST_SEEN] = now
+            self._pull(base, state)
+            return True
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def _slot_base(self, key):
+        slot = self._find(key)
+        return None if slot is None else slot * self.width
+
+    # ---------- per-request ----------
+
+    def record(self, session_id, state, now, wall_now):
+        """Count one request; refresh `state` from the shared slot. False if not shared."""
+        key = _key(session_id)
+        values = self._values
+        with self._lock(key):
+            base = self._slot_base(key)
+            if base is None:
+                return False
+
+            seq = int(values[base + W_SEQ])
+            values[base + W_TIMES + seq % self.window] = now
+            values[base + W_SEQ] = seq + 1
+
+            aggregate = SessionAggregate(
+                _opt(values[base + FIRST_TS]), _opt(values[base + LAST_TS]),
+                int(values[base + I_COUNT]), values[base + I_SUM],
+                _opt(values[base + I_MIN]), values[base + I_M2]
+            )
+            aggregate.record(wall_now)
+            values[base + FIRST_TS] = _nan(aggregate.first_ts)
+            values[base + LAST_TS] = _nan(aggregate.last_ts)
+            values[base + I_COUNT] = aggregate.interval_count
+            values[base + I_SUM] = aggregate.interval_sum
+            values[base + I_MIN] = _nan(aggregate.min_interval)
+            values[base + I_M2] = aggregate.interval_m2
+
+            values[base + TOTAL] += 1
+            values[base + DIRTY] = 1
+            values[base + LAST_SEEN] = now
+            self._pull(base, state)
+        return True
+
+    def _pull(self, base, state):
+        """Copy a slot into a SessionState. Caller holds the lock."""
+        values = self._values
+        state.total_requests = int(values[base + TOTAL])
+        state.avg_request_interval = _opt(values[base + AVG_INTERVAL])
+        state.max_request_rate = _opt(values[base + MAX_RATE])
+        state.last_escalation = int(values[base + LAST_ESCALATION])
+        state.aggregate = SessionAggregate(
+            _opt(values[base + FIRST_TS]), _opt(values[base + LAST_TS]),
+            int(values[base + I_COUNT]), values[base + I_SUM],
+            _opt(values[base + I_MIN]), values[base + I_M2]
+        )
+
+        # Feed the worker's own window only the timestamps it has not seen
+        # yet (usually just this request); start over if the slot was
+        # reused or more than a window went by in other workers
+        seq = int(values[base + W_SEQ])
+        window = state.rate_window
+        if seq < state.window_seq or seq - state.window_seq > self.window:
+            window.clear()
+            state.window_seq = max(seq - self.window, 0)
+        times = base + W_TIMES
+        for n in range(state.window_seq, seq):
+            window.record(values[times + n % self.window])
+        state.window_seq = seq
+
+    def set_metrics(self, session_id, avg_request_interval, max_request_rate):
+        key = _key(session_id)
+        with self._lock(key):
+            base = self._slot_base(key)
+            if base is None:
+                return False
+            self._values[base + AVG_INTERVAL] = _nan(avg_request_interval)
+            self._values[base + MAX_RATE] = _nan(max_request_rate)
+            self._values[base + DIRTY] = 1
+        return True
+
+    def claim_escalation(self, session_id, total_requests, every):
+        """
+        True if this request may escalate to the agent: at most once every
+        `every` requests per session, whichever worker serves them.
+        """
+        key = _key(session_id)
+        with self._lock(key):
+            base = self._slot_base(key)
+            if base is None:
+                return True
+            last = self._values[base + LAST_ESCALATION]
+            if last and total_requests - last < every:
+                return False
+            self._values[base + LAST_ESCALATION] = total_requests
+        return True
+
+    # ---------- write-behind ----------
+
+    def take_dirty(self, session_id):
+        """
+        The user_sessions values to write for a dirty slot, clearing the
+        flag, or None.  Row order matches SessionStateCache.flush().
+        """
+        key = _key(session_id)
+        values = self._values
+        with self._lock(key):
+            base = self._slot_base(key)
+            if base is None or not values[base + DIRTY]:
+                return None
+            values[base + DIRTY] = 0
+            return (
+                int(values[base + TOTAL]),
+                _opt(values[base + AVG_INTERVAL]),
+                _opt(values[base + MAX_RATE]),
+                _opt(values[base + FIRST_TS]),
+                _opt(values[base + LAST_TS]),
+                int(values[base + I_COUNT]),
+                values[base + I_SUM],
+                _opt(values[base + I_MIN]),
+                values[base + I_M2],
+            )
+
+    def mark_dirty(self, session_id):
+        key = _key(session_id)
+        with self._lock(key):
+            base = self._slot_base(key)
+            if base is not None:
+                self._values[base + DIRTY] = 1
+
+    def release(self, session_id):
+        """Free a session's slot (logout); it must have been flushed"""
+        key = _key(session_id)
+        with self._lock(key):
+            slot = self._find(key)
+            if slot is not None:
+                self._keys[slot] = TOMBSTONE
+
+    def release_idle(self, cutoff):
+        """Free clean slots not touched since `cutoff` (monotonic seconds)"""
+        values = self._values
+        for slot in range(self.slots):
+            key = self._keys[slot]
+            if key in (EMPTY, TOMBSTONE):
+                continue
+            base = slot * self.width
+            with self._lock(key):
+                if self._keys[slot] == key and not values[base + DIRTY] \
+                        and values[base + LAST_SEEN] < cutoff:
+                    self._keys[slot] = TOMBSTONE
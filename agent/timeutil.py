@@ -0,0 +1,19 @@
+import time
+from datetime import datetime, timezone
+
+# SQL expression turning an ISO-8601 TEXT column into epoch milliseconds
+ISO_TO_MS_SQL = "CAST(round((julianday({col}) - 2440587.5) * 86400000.0) AS INTEGER)"
+
+
+def now_ms():
+    """Current UTC time as integer epoch milliseconds"""
+    return time.time_ns() // 1_000_000
+
+
+def interval_seconds(start_ms, end_ms):
+    return (end_ms - start_ms) / 1000
+
+
+def ms_to_iso(ts_ms):
+    """Display form used by the TEXT columns (naive UTC, like utcnow().isoformat())"""
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).replace(tzinfo=None).isoformat()
@@ -0,0 +1,129 @@
+import sys
+import time
+
+import numpy as np
+
+LEAF = -1
+
+
+class FlatForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous arrays.
+    All trees share one node table (feature, threshold, left, right, value);
+    roots[t] is the first node of tree t.  Leaves point both children at
+    themselves, so a batch walks every tree in lock-step for max_depth
+    steps with plain fancy indexing and no per-tree Python calls.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_names = feature_names
+
+        # children[2 * node + go_right] picks the branch in one lookup
+        self._children = np.stack([left, right], axis=1).ravel()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # ---------- export ----------
+
+    @classmethod
+    def from_model(cls, model):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == LEAF
+            own = np.arange(offset, offset + n)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset))
+            # Leaf class fractions, as DecisionTreeClassifier.predict_proba returns them
+            values.append(tree.value[:, 0, :model.n_classes_])
+            roots.append(offset)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.array(roots, dtype=np.intp),
+            max_depth=max(e.tree_.max_depth for e in model.estimators_),
+            feature_names=getattr(model, "feature_names_in_", None),
+        )
+
+    # ---------- evaluation ----------
+
+    def leaves(self, X):
+        """Leaf node reached in every tree: (n_rows, n_trees) node indices"""
+        n_rows, n_features = X.shape
+        flat_X = np.ascontiguousarray(X).ravel()
+        # Offset of each (row, tree) pair's row in flat_X
+        row_base = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        node = np.tile(self.roots, n_rows)
+
+        for _ in range(self.max_depth):
+            # float32 features compared against float64 thresholds, as in sklearn
+            x = flat_X.take(row_base + self.feature.take(node))
+            go_right = x > self.threshold.take(node)
+            node = self._children.take(2 * node + go_right)
+
+        return node.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        """
+        Mean leaf class fractions over all trees.
+        X is float32 in feature order.  Trees are summed in order
+        (cumsum is sequential), matching sklearn bit for bit.
+        """
+        leaf_values = self.value[self.leaves(X)]          # (rows, trees, classes)
+        total = np.cumsum(leaf_values, axis=1)[:, -1]
+        return total / self.n_trees
+
+
+def benchmark(model, batch_sizes=(1, 64, 4096), repeat=200, seed=0):
+    """Time sklearn predict_proba vs FlatForest.predict_proba per batch size"""
+    forest = FlatForest.from_model(model)
+    rng = np.random.default_rng(seed)
+    columns = model.feature_names_in_ if hasattr(model, "feature_names_in_") else None
+
+    for size in batch_sizes:
+        X = (rng.random((size, model.n_features_in_)) * rng.choice([1, 100, 10000], model.n_features_in_))
+        X = X.astype(np.float32)
+        if columns is not None:
+            import pandas as pd
+            X_sklearn = pd.DataFrame(X, columns=columns)
+        else:
+            X_sklearn = X
+
+        loops = max(3, repeat // max(1, size // 64))
+        timings = {}
+        for name, fn, data in (("sklearn", model.predict_proba, X_sklearn),
+                               ("flat", forest.predict_proba, X)):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn(data)
+            timings[name] = (time.perf_counter() - start) / loops * 1e6
+
+        print(f"⏱️ batch {size:>5}: sklearn {timings['sklearn']:10.1f} µs   "
+              f"flat {timings['flat']:10.1f} µs   ({timings['sklearn'] / timings['flat']:.1f}x)")
+
+
+if __name__ == "__main__":
+    import joblib
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "models/sentinel_rf_model.pkl"
+    benchmark(joblib.load(model_path))
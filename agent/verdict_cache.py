@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+VERDICT_CACHE_SIZE = 4096
+
+
+class VerdictCache:
+    """
+    Bounded LRU of agent results, one entry per session.
+    Each entry carries the fingerprint (scored feature values plus the
+    rule-table version) it was computed from; a lookup with a different
+    fingerprint is a miss and drops the stale entry, so a session whose
+    state moved is always re-scored and an unchanged one never is.
+    """
+
+    def __init__(self, maxsize=VERDICT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, session_id, fingerprint):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            cached_fingerprint, result = entry
+            if cached_fingerprint != fingerprint:
+                del self._entries[session_id]
+                self.misses += 1
+                self.stale += 1
+                return None
+
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+
+        return _copy(result)
+
+    def put(self, session_id, fingerprint, result):
+        with self._lock:
+            self._entries[session_id] = (fingerprint, _copy(result))
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, session_id=None):
+        """Forget one session's verdict, or all of them"""
+        with self._lock:
+            if session_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(session_id, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _copy(result):
+    """Results are handed to callers that may mutate them"""
+    return dict(result, rules_triggered=list(result["rules_triggered"]))
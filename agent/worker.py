@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DETECTION_WORKERS = 4
+
+
+class DetectionPool:
+    """
+    Runs agent evaluations off the request thread.
+    A job evaluates the session (rules + ML), queues the security event
+    and, on BLOCK, calls on_block first so the verdict reaches the shared
+    blocklist before the slower permanent-block writes.  One job per
+    session is in flight at a time; duplicate submits share its future.
+    """
+
+    def __init__(self, max_workers=DETECTION_WORKERS, on_block=None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="detection"
+        )
+        self._on_block = on_block
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self.failed = 0
+
+    def submit(self, session_id, username, reasons=None, coalesce=True):
+        """
+        Queue an evaluation; returns a Future resolving to the agent result.
+        coalesce=False forces a fresh job (e.g. logout, whose final metrics
+        an already running evaluation would not have seen).
+        """
+        with self._lock:
+            future = self._in_flight.get(session_id)
+            if future is not None and coalesce:
+                self.coalesced += 1
+                return future
+
+            future = self._executor.submit(self._evaluate, session_id, username, reasons)
+            self._in_flight[session_id] = future
+            self.submitted += 1
+
+        future.add_done_callback(lambda f: self._done(session_id, f))
+        return future
+
+    def _done(self, session_id, future):
+        with self._lock:
+            if self._in_flight.get(session_id) is future:
+                del self._in_flight[session_id]
+
+    def _evaluate(self, session_id, username, reasons):
+        from agent.agent import evaluate_session
+        from agent.memory import record_event, permanently_block_user
+
+        try:
+            result = evaluate_session(session_id)
+            if not result:
+                return None
+
+            print(f"🤖 Agent decision: {result['action']}")
+
+            if result["action"] == "BLOCK":
+                print(f"\n🚫🚫🚫 BLOCKING USER: {username} 🚫🚫🚫\n")
+                self.blocked += 1
+                if self._on_block:
+                    self._on_block(session_id)
+
+            # on_block has already written the session's block flag
+            record_event(result, username, block_flag_written=self._on_block is not None)
+
+            if result["action"] == "BLOCK":
+                permanently_block_user(username, session_id, reasons or result["rules_triggered"])
+            elif result["action"] == "WARN":
+                print("⚠️ WARNING - Monitoring continues...")
+
+            return result
+
+        except Exception as e:
+            self.failed += 1
+            print(f"❌ ERROR IN detection worker: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {
+            "in_flight": in_flight,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "blocked": self.blocked,
+            "failed": self.failed,
+        }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
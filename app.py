@@ -1,339 +1,226 @@
-from flask import Flask, render_template, request, redirect, url_for, session, abort
-import sqlite3
+from flask import Flask, render_template, request, redirect, url_for, session, abort, g, jsonify
 import uuid
-from datetime import datetime
-import os
+from concurrent.futures import TimeoutError
+from contextlib import contextmanager
+from time import perf_counter
+
+from agent.block_broadcast import broadcast as block_broadcast
+from agent.blocklist import blocked_users
+from agent.db import get_connection, pooled_connection
+from agent.log_writer import RequestLogWriter
+from agent.migrations import migrate
+from agent.ml_tool import model_manager
+from agent.queries import (
+    LOGIN_QUERY, LOGIN_FAILED_QUERY, SESSION_EXISTS_QUERY, LOGIN_UPDATE_SESSION_QUERY,
+    LOGIN_INSERT_SESSION_QUERY, LOGOUT_SESSION_QUERY, LOGOUT_UPDATE_QUERY
+)
+from agent.rate_tracker import SessionAggregate
+from agent.rules import score_session_rules, realtime_reasons
+from agent.timeutil import now_ms, ms_to_iso, interval_seconds
+from agent.worker import DetectionPool
+from agent.session_cache import SessionStateCache
 
 app = Flask(__name__)
 app.secret_key = "sentinel-secret-key"
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "db", "database.db")
+# Hot-path counters live here; user_sessions is updated write-behind
+# (session blocks decided in another worker arrive through block_broadcast)
+session_cache = SessionStateCache(broadcast=block_broadcast)
+
+# request_logs rows are queued and written in batches off the request thread
+request_log_writer = RequestLogWriter()
+
+# Agent evaluations run here; BLOCK verdicts are written into session_cache
+detection_pool = DetectionPool(on_block=session_cache.mark_blocked)
+
+MIN_WINDOW = 5        # requests in the rate window before detection kicks in
+ESCALATE_EVERY = 5    # re-run the agent at most once per N requests
+
+# Wait on the request thread for the verdict when the rules alone score at
+# least this much (None: never wait, the next request enforces the block)
+SYNC_WAIT_RULE_RISK = None
+SYNC_WAIT_TIMEOUT = 2.0
+
 
 def get_db_connection():
-    conn = sqlite3.connect(
-        DB_PATH,
-        timeout=10,
-        check_same_thread=False
-    )
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Connection from the shared pool (WAL); close() gives it back"""
+    return get_connection()
 
 
 def init_db():
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            is_blocked INTEGER DEFAULT 0
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS user_sessions (
-            session_id TEXT PRIMARY KEY,
-            user_id INTEGER,
-            username TEXT,
-            ip_address TEXT,
-            user_agent TEXT,
-            login_time TEXT,
-            logout_time TEXT,
-            session_duration INTEGER,
-            total_requests INTEGER DEFAULT 0,
-            failed_logins INTEGER DEFAULT 0,
-            avg_request_interval REAL,
-            max_request_rate REAL,
-            is_authenticated INTEGER DEFAULT 0,
-            is_blocked INTEGER DEFAULT 0
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS request_logs (
-            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            endpoint TEXT,
-            request_time TEXT,
-            method TEXT,
-            response_code INTEGER
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS security_events (
-            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            username TEXT,
-            risk_score REAL,
-            ml_score REAL,
-            triggered_rules TEXT,
-            action_taken TEXT,
-            event_time TEXT
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS blocked_users (
-            username TEXT PRIMARY KEY,
-            block_reason TEXT,
-            block_time TEXT,
-            session_id TEXT
-        )
-    """)
+    """Create or upgrade the schema (see agent/migrations.py)"""
+    migrate()
 
-    conn.commit()
-    conn.close()
+
+# 🔥 REQUEST PIPELINE: one pass over one cached session snapshot
+@contextmanager
+def timed_stage(name):
+    """Record the wall time of a pipeline stage (ms) in g.stage_timings"""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        g.stage_timings[name] = (perf_counter() - start) * 1000
 
 
-# 🔥 CHECK 1: Block users who are in blocked_users table
 @app.before_request
-def check_blocked_user():
-    """Prevent blocked users from even attempting login"""
-    if request.endpoint == "login" and request.method == "POST":
-        username = request.form.get("username")
-        if username:
-            conn = get_db_connection()
-            cur = conn.cursor()
-            
-            blocked = cur.execute("""
-                SELECT block_reason, block_time 
-                FROM blocked_users 
-                WHERE username = ?
-            """, (username,)).fetchone()
-            
-            conn.close()
-            
-            if blocked:
-                print(f"🚫 BLOCKED USER LOGIN ATTEMPT: {username}")
-                return render_template(
-                    "blocked.html",
-                    message=f"Account '{username}' has been permanently blocked due to suspicious activity."
-                ), 403
+def request_pipeline():
+    """
+    Runs every security check for the request in a single pass:
+    login block check, session block enforcement, logging/counting
+    and realtime detection all work on the cached session state, so
+    a normal request does no synchronous SQLite work at all.
+    """
+    g.stage_timings = {}
 
+    if request.endpoint in ("static", "ready"):
+        return
 
-# 🔥 CHECK 2: Block active sessions that are flagged
-@app.before_request
-def enforce_session_block():
-    """Block any session that's marked as blocked"""
-    # Skip login and static files
-    if request.endpoint in ("login", "static"):
+    if request.endpoint == "login":
+        if request.method == "POST":
+            with timed_stage("blocked_user"):
+                return check_blocked_user()
         return
 
     if "session_id" not in session:
         return
 
-    conn = get_db_connection()
-    cur = conn.cursor()
+    session_id = session["session_id"]
 
-    row = cur.execute("""
-        SELECT is_blocked, username
-        FROM user_sessions
-        WHERE session_id = ?
-    """, (session["session_id"],)).fetchone()
+    with timed_stage("load"):
+        state = session_cache.get(session_id)
 
-    conn.close()
+    with timed_stage("enforce"):
+        enforce_session_block(state)
 
-    if row and row["is_blocked"] == 1:
-        print(f"🚫 BLOCKED SESSION ACCESS DENIED: {row['username']}")
-        session.clear()
-        abort(403)  # Use abort instead of return
+    if request.endpoint == "logout":
+        return
 
+    with timed_stage("log"):
+        total_requests = log_and_count_request(session_id)
 
-# 🔥 CHECK 3: Log every request FIRST
-@app.before_request
-def log_and_count_request():
-    """Log request and increment counter BEFORE detection"""
-    if request.endpoint in ("logout", "static", "login"):
-        return
+    if state is not None:
+        with timed_stage("detect"):
+            detect_attack_realtime(session_id, state, total_requests)
 
-    if "session_id" not in session:
+
+@app.after_request
+def expose_stage_timings(response):
+    """Expose per-stage pipeline timings as a Server-Timing header"""
+    timings = getattr(g, "stage_timings", None)
+    if timings:
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={ms:.2f}" for name, ms in timings.items()
+        )
+    return response
+
+
+# 🔥 CHECK 1: Block users who are in blocked_users table
+def check_blocked_user():
+    """Prevent blocked users from even attempting login"""
+    username = request.form.get("username")
+    if not username:
         return
 
-    conn = get_db_connection()
-    cur = conn.cursor()
+    # In-memory index: a Bloom filter miss answers without touching SQLite
+    if blocked_users.contains(username):
+        print(f"🚫 BLOCKED USER LOGIN ATTEMPT: {username}")
+        return render_template(
+            "blocked.html",
+            message=f"Account '{username}' has been permanently blocked due to suspicious activity."
+        ), 403
 
-    now = datetime.utcnow().isoformat()
 
-    # Log the request
-    cur.execute("""
-        INSERT INTO request_logs (
-            session_id, endpoint, request_time, method, response_code
-        )
-        VALUES (?, ?, ?, ?, ?)
-    """, (session["session_id"], request.path, now, request.method, 200))
-    
-    # Increment counter
-    cur.execute("""
-        UPDATE user_sessions
-        SET total_requests = total_requests + 1
-        WHERE session_id = ?
-    """, (session["session_id"],))
-    
-    conn.commit()
-    conn.close()
+# 🔥 CHECK 2: Block active sessions that are flagged
+def enforce_session_block(state):
+    """Block any session that's marked as blocked"""
+    if state and state.is_blocked == 1:
+        print(f"🚫 BLOCKED SESSION ACCESS DENIED: {state.username}")
+        session.clear()
+        abort(403)
+
+
+# 🔥 CHECK 3: Log every request FIRST
+def log_and_count_request(session_id):
+    """
+    Log request and increment counter BEFORE detection.
+    The log row goes to the batched writer; the counter only moves in
+    the session cache and reaches user_sessions on the next flush.
+    """
+    ts = now_ms()
+
+    request_log_writer.submit(
+        (session_id, request.path, ms_to_iso(ts), request.method, 200, ts)
+    )
+
+    return session_cache.increment(session_id)
 
 
 # 🔥 CHECK 4: DETECT ATTACK - This runs AFTER logging
-@app.before_request
-def detect_attack_realtime():
+def detect_attack_realtime(session_id, state, total_requests):
     """
-    Check EVERY 5 REQUESTS for attack patterns
+    Check EVERY request against the in-memory rate window (no DB read)
+    Escalate to the agent at most every ESCALATE_EVERY requests
     Use abort(403) to STOP request immediately
     """
-    if request.endpoint in ("login", "static", "logout"):
+    window = state.rate_window
+    if window.count < MIN_WINDOW:
         return
 
-    if "session_id" not in session:
+    username = state.username
+    rate = window.rate
+    avg_interval = window.mean_interval
+
+    # 🚨 ATTACK DETECTION LOGIC (thresholds: "realtime" in agent/rules.json)
+    reason = realtime_reasons(rate, avg_interval, total_requests)
+
+    if not reason:
         return
 
-    session_id = session["session_id"]
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    # Get current state
-    session_data = cur.execute("""
-        SELECT total_requests, is_blocked, username
-        FROM user_sessions
-        WHERE session_id = ?
-    """, (session_id,)).fetchone()
-
-    if not session_data:
-        conn.close()
+    # Suspicion is cheap to re-check; the agent only runs every few requests
+    if not session_cache.claim_escalation(session_id, state, total_requests, ESCALATE_EVERY):
         return
 
-    # Already blocked? Deny immediately with abort
-    if session_data["is_blocked"] == 1:
-        conn.close()
-        print(f"🚫 Session already blocked: {session_data['username']}")
-        session.clear()
-        abort(403)  # Use abort to STOP request
+    print(f"\n{'='*60}")
+    print(f"🔍 ATTACK CHECK #{total_requests} - User: {username}")
+    print(f"{'='*60}")
+    print(f"📊 Analyzed {window.count} requests")
+    print(f"📊 Time span: {window.span:.2f}s")
+    print(f"📊 Rate: {rate:.2f} req/s")
+    print(f"📊 Avg interval: {avg_interval:.3f}s")
+    print(f"\n🔴🔴🔴 ATTACK CONFIRMED 🔴🔴🔴")
+    print(f"Reasons: {', '.join(reason)}")
+
+    # Update metrics and flush them so the agent reads fresh state
+    session_cache.set_metrics(session_id, avg_interval, rate)
+    session_cache.flush_session(session_id)
+
+    # 🤖 Hand off to the detection pool; a BLOCK verdict lands in the
+    # session cache and the next request's enforce stage acts on it
+    print("🤖 Queueing agent evaluation...")
+    future = detection_pool.submit(session_id, username, reason)
+    print(f"{'='*60}\n")
+
+    if SYNC_WAIT_RULE_RISK is None:
+        return
 
-    total_requests = session_data["total_requests"]
-    username = session_data["username"]
+    rule_risk, _ = score_session_rules(state.as_dict())
+    if rule_risk < SYNC_WAIT_RULE_RISK:
+        return
 
-    # 🔥 CHECK EVERY 5 REQUESTS
-    if total_requests >= 5 and total_requests % 5 == 0:
-        print(f"\n{'='*60}")
-        print(f"🔍 ATTACK CHECK #{total_requests} - User: {username}")
-        print(f"{'='*60}")
-        
-        # Get last 10 requests for analysis
-        rows = cur.execute("""
-            SELECT request_time
-            FROM request_logs
-            WHERE session_id = ?
-            ORDER BY request_time DESC
-            LIMIT 10
-        """, (session_id,)).fetchall()
-
-        if len(rows) >= 5:
-            timestamps = [datetime.fromisoformat(r["request_time"]) for r in rows]
-            timestamps.reverse()  # Oldest to newest
-            
-            # Calculate time span and rate
-            time_span = (timestamps[-1] - timestamps[0]).total_seconds()
-            rate = len(timestamps) / time_span if time_span > 0 else 999
-            
-            # Calculate average interval
-            intervals = [(timestamps[i] - timestamps[i-1]).total_seconds() 
-                        for i in range(1, len(timestamps))]
-            avg_interval = sum(intervals) / len(intervals) if intervals else 0
-            
-            print(f"📊 Analyzed {len(timestamps)} requests")
-            print(f"📊 Time span: {time_span:.2f}s")
-            print(f"📊 Rate: {rate:.2f} req/s")
-            print(f"📊 Avg interval: {avg_interval:.3f}s")
-            
-            # 🚨 ATTACK DETECTION LOGIC
-            is_attack = False
-            reason = []
-            
-            # CRITICAL: Very fast rate
-            if rate > 3:
-                is_attack = True
-                reason.append(f"Excessive rate: {rate:.1f} req/s")
-                print(f"🚨 ATTACK: Rate = {rate:.2f} req/s (threshold: 3)")
-            
-            # CRITICAL: Bot-like intervals
-            if avg_interval < 0.5:
-                is_attack = True
-                reason.append(f"Bot intervals: {avg_interval:.3f}s")
-                print(f"🚨 ATTACK: Interval = {avg_interval:.3f}s (threshold: 0.5)")
-            
-            # HIGH: Burst pattern
-            if total_requests > 15 and avg_interval < 1.0:
-                is_attack = True
-                reason.append(f"Burst traffic: {total_requests} requests")
-                print(f"🚨 ATTACK: Burst pattern detected")
-            
-            if is_attack:
-                print(f"\n🔴🔴🔴 ATTACK CONFIRMED 🔴🔴🔴")
-                print(f"Reasons: {', '.join(reason)}")
-                
-                # Update metrics
-                cur.execute("""
-                    UPDATE user_sessions
-                    SET avg_request_interval = ?,
-                        max_request_rate = ?
-                    WHERE session_id = ?
-                """, (avg_interval, rate, session_id))
-                conn.commit()
-                
-                # 🤖 Call agent for evaluation
-                from agent.agent import evaluate_session
-                from agent.memory import store_event, permanently_block_user
-                
-                print("🤖 Calling agent for evaluation...")
-                result = evaluate_session(session_id)
-                
-                if result:
-                    print(f"🤖 Agent decision: {result['action']}")
-                    store_event(result)
-                    
-                    # 🔴 IMMEDIATE BLOCK
-                    if result["action"] == "BLOCK":
-                        print(f"\n🚫🚫🚫 BLOCKING USER: {username} 🚫🚫🚫\n")
-                        
-                        cur.execute("""
-                            UPDATE user_sessions
-                            SET is_blocked = 1
-                            WHERE session_id = ?
-                        """, (session_id,))
-                        conn.commit()
-
-                        # 2️⃣ Permanently block user (login-level)
-                        permanently_block_user(username, session_id, reason)
-
-                        # 3️⃣ Clear flask session
-                        session.clear()
-
-                        # 4️⃣ 💣 HARD STOP REQUEST (THIS IS THE ACTUAL BLOCK)
-                        abort(403)
-                        conn.close()
-                        
-                        # Permanently block the user
-                        permanently_block_user(username, session_id, reason)
-                        
-                        # Clear session
-                        session.clear()
-                        
-                        # 🔥 USE ABORT TO STOP REQUEST IMMEDIATELY
-                        print(f"🚫 Aborting request with 403\n")
-                        abort(403)  # This STOPS the request!
-                    
-                    elif result["action"] == "WARN":
-                        print("⚠️ WARNING - Monitoring continues...")
-            else:
-                print(f"✅ Normal traffic - Rate: {rate:.2f} req/s, Interval: {avg_interval:.3f}s")
-        
-        print(f"{'='*60}\n")
-    
-    conn.close()
+    print(f"⏳ Rule risk {rule_risk} - waiting for the agent verdict")
+    try:
+        result = future.result(timeout=SYNC_WAIT_TIMEOUT)
+    except TimeoutError:
+        return
+
+    # 🔴 IMMEDIATE BLOCK
+    if result and result["action"] == "BLOCK":
+        session.clear()
+
+        # 💣 HARD STOP REQUEST (THIS IS THE ACTUAL BLOCK)
+        print(f"🚫 Aborting request with 403\n")
+        abort(403)
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -341,32 +228,23 @@ def login():
     if "temp_session_id" not in session:
         session["temp_session_id"] = str(uuid.uuid4())
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
     if request.method == "POST":
+        conn = get_db_connection()
+        cur = conn.cursor()
+
         username = request.form["username"]
         password = request.form["password"]
         
         ip_address = request.remote_addr
         user_agent = request.headers.get("User-Agent")
-        now = datetime.utcnow().isoformat()
+        ts = now_ms()
+        now = ms_to_iso(ts)
 
-        user = cur.execute(
-            "SELECT * FROM users WHERE username = ? AND password = ?",
-            (username, password)
-        ).fetchone()
+        user = cur.execute(LOGIN_QUERY, (username, password)).fetchone()
         
         if user is None:
-            cur.execute("""
-                INSERT INTO user_sessions (
-                    session_id, username, ip_address, user_agent,
-                    login_time, failed_logins, is_authenticated
-                )
-                VALUES (?, ?, ?, ?, ?, 1, 0)
-                ON CONFLICT(session_id)
-                DO UPDATE SET failed_logins = failed_logins + 1
-            """, (session["temp_session_id"], username, ip_address, user_agent, now))
+            cur.execute(LOGIN_FAILED_QUERY,
+                        (session["temp_session_id"], username, ip_address, user_agent, now, ts))
             conn.commit()
             conn.close()
             return render_template("login.html", error="Invalid credentials")
@@ -374,25 +252,14 @@ def login():
         # Successful login
         session_id = session.pop("temp_session_id", str(uuid.uuid4()))
 
-        existing = cur.execute("""
-            SELECT session_id FROM user_sessions WHERE session_id = ?
-        """, (session_id,)).fetchone()
+        existing = cur.execute(SESSION_EXISTS_QUERY, (session_id,)).fetchone()
 
         if existing:
-            cur.execute("""
-                UPDATE user_sessions
-                SET user_id = ?, username = ?, ip_address = ?,
-                    user_agent = ?, login_time = ?, is_authenticated = 1
-                WHERE session_id = ?
-            """, (user["id"], username, ip_address, user_agent, now, session_id))
+            cur.execute(LOGIN_UPDATE_SESSION_QUERY,
+                        (user["id"], username, ip_address, user_agent, now, ts, session_id))
         else:
-            cur.execute("""
-                INSERT INTO user_sessions (
-                    session_id, user_id, username, ip_address, user_agent,
-                    login_time, is_authenticated
-                )
-                VALUES (?, ?, ?, ?, ?, ?, 1)
-            """, (session_id, user["id"], username, ip_address, user_agent, now))
+            cur.execute(LOGIN_INSERT_SESSION_QUERY,
+                        (session_id, user["id"], username, ip_address, user_agent, now, ts))
 
         conn.commit()
         conn.close()
@@ -446,64 +313,41 @@ def logout():
 
     if session_id:
         try:
-            conn = get_db_connection()
-            cur = conn.cursor()
-
-            rows = cur.execute("""
-                SELECT request_time
-                FROM request_logs
-                WHERE session_id = ?
-                ORDER BY request_time
-            """, (session_id,)).fetchall()
-
-            timestamps = [datetime.fromisoformat(r["request_time"]) for r in rows]
-            total_requests = len(timestamps)
-
-            if total_requests > 1:
-                intervals = [(timestamps[i] - timestamps[i-1]).total_seconds() 
-                            for i in range(1, total_requests)]
-                avg_request_interval = sum(intervals) / len(intervals)
-                max_request_rate = 1 / min(intervals) if min(intervals) > 0 else total_requests
-            else:
-                avg_request_interval = None
-                max_request_rate = None
-
-            logout_time = datetime.utcnow()
-            
-            row = cur.execute("""
-                SELECT login_time, username
-                FROM user_sessions
-                WHERE session_id = ?
-            """, (session_id,)).fetchone()
-
-            if row and row["login_time"]:
-                login_time = row["login_time"]
-                username = row["username"]
-                session_duration = (logout_time - datetime.fromisoformat(login_time)).total_seconds()
-
-                cur.execute("""
-                    UPDATE user_sessions
-                    SET logout_time = ?, session_duration = ?,
-                        total_requests = ?, avg_request_interval = ?,
-                        max_request_rate = ?
-                    WHERE session_id = ?
-                """, (logout_time.isoformat(), session_duration, total_requests,
-                     avg_request_interval, max_request_rate, session_id))
-
-                conn.commit()
-                conn.close()
-
-                from agent.agent import evaluate_session
-                from agent.memory import store_event, permanently_block_user
-
-                result = evaluate_session(session_id)
-
-                if result:
-                    store_event(result)
-                    
-                    if result["action"] == "BLOCK":
-                        permanently_block_user(username, session_id, result["rules_triggered"])
-                        print(f"🚫 User {username} blocked at logout")
+            # Write back buffered counters and log rows before the final metrics pass
+            session_cache.evict(session_id)
+            request_log_writer.flush()
+
+            logout_ts = now_ms()
+            logged_out = False
+
+            with pooled_connection() as conn:
+                cur = conn.cursor()
+
+                # Running aggregates are kept per request, so this is O(1)
+                row = cur.execute(LOGOUT_SESSION_QUERY, (session_id,)).fetchone()
+
+                if row and row["login_ts"]:
+                    username = row["username"]
+                    total_requests = row["total_requests"]
+                    session_duration = interval_seconds(row["login_ts"], logout_ts)
+
+                    aggregate = SessionAggregate(
+                        interval_count=row["interval_count"],
+                        interval_sum=row["interval_sum"],
+                        min_interval=row["min_request_interval"]
+                    )
+                    avg_request_interval = aggregate.mean_interval
+                    max_request_rate = aggregate.max_rate(total_requests)
+
+                    cur.execute(LOGOUT_UPDATE_QUERY, (ms_to_iso(logout_ts), logout_ts, session_duration,
+                         avg_request_interval, max_request_rate, session_id))
+
+                    conn.commit()
+                    logged_out = True
+
+            if logged_out:
+                # Final verdict on the complete session, off the request thread
+                detection_pool.submit(session_id, username, coalesce=False)
 
         except Exception as e:
             print(f"❌ ERROR IN LOGOUT: {e}")
@@ -514,6 +358,13 @@ def logout():
     return redirect(url_for("login"))
 
 
+# Readiness probe: 503 until the detection model is loaded and warmed up
+@app.route("/ready")
+def ready():
+    status = model_manager.status()
+    return jsonify(status), 200 if model_manager.ready else 503
+
+
 # 🔥 CUSTOM ERROR HANDLER FOR 403
 @app.errorhandler(403)
 def forbidden(e):
@@ -524,4 +375,6 @@ def forbidden(e):
 
 if __name__ == "__main__":
     init_db()
+    model_manager.start()
+    blocked_users.load()
     app.run(debug=True, use_reloader=False)
\ No newline at end of file
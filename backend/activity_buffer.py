@@ -0,0 +1,173 @@
+"""
+Group-commit buffer for activity_logs.
+
+log_request_async() hands its row to the buffer and awaits it; the
+buffer writes everything queued by concurrent requests with a single
+COPY (asyncpg copy_records_to_table) once ACTIVITY_FLUSH_ROWS rows are
+waiting or ACTIVITY_FLUSH_INTERVAL_MS after the first one arrived.  A
+request only returns once its row is committed, so the feature query
+that follows it in /track still sees the row, but a burst of N events
+costs one round trip and one commit instead of N.
+"""
+import asyncio
+import logging
+import time
+
+from async_db import acquire
+from config import ACTIVITY_FLUSH_ROWS, ACTIVITY_FLUSH_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_COLUMNS = (
+    "user_id",
+    "session_id",
+    "ip_address",
+    "endpoint",
+    "http_method",
+    "response_status",
+    "bytes_sent",
+    "bytes_received",
+    "processing_time_ms",
+    "timestamp",
+)
+
+
+class ActivityBuffer:
+    """Collects activity_logs rows and COPYs them in batches"""
+
+    def __init__(self, max_rows: int = ACTIVITY_FLUSH_ROWS,
+                 flush_interval: float = ACTIVITY_FLUSH_INTERVAL_MS / 1000):
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+
+        self._rows = []
+        self._waiters = []
+        self._pending = None
+        self._full = None
+        self._flush_lock = None
+        self._task = None
+        self._stopping = False
+
+        self.peak_depth = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.failed_flushes = 0
+        self.flush_ms_total = 0.0
+        self.flush_ms_max = 0.0
+        self.last_batch = 0
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> None:
+        """Start the flusher on the running event loop (idempotent)."""
+        if self._task is not None:
+            return
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the flusher."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._pending.set()
+        self._full.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._pending.wait()
+            if not self._stopping:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self.flush()
+            if self._stopping and not self._rows:
+                return
+
+    # ---------- writes ----------
+
+    async def submit(self, row: tuple) -> None:
+        """Queue one row (in ACTIVITY_COLUMNS order) and wait until it is committed."""
+        if self._task is None:
+            self.start()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._rows.append(row)
+        self._waiters.append(waiter)
+        self.peak_depth = max(self.peak_depth, len(self._rows))
+
+        self._pending.set()
+        if len(self._rows) >= self.max_rows:
+            self._full.set()
+
+        await waiter
+
+    async def flush(self) -> None:
+        """COPY the queued rows now and resolve their waiters."""
+        async with self._flush_lock:
+            rows, waiters = self._rows[:self.max_rows], self._waiters[:self.max_rows]
+            del self._rows[:self.max_rows], self._waiters[:self.max_rows]
+            if len(self._rows) < self.max_rows:
+                self._full.clear()
+            if not self._rows:
+                self._pending.clear()
+            if not rows:
+                return
+
+            try:
+                await self._copy(rows)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(rows)} activity rows: {str(e)}")
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(Exception("Failed to log request"))
+                return
+
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def write(self, rows: list) -> None:
+        """COPY a caller's whole batch at once, bypassing the queue."""
+        if rows:
+            await self._copy(rows)
+
+    async def _copy(self, rows: list) -> None:
+        start = time.perf_counter()
+        try:
+            async with acquire() as conn:
+                await conn.copy_records_to_table(
+                    "activity_logs", records=rows, columns=ACTIVITY_COLUMNS
+                )
+        except Exception:
+            self.failed_flushes += 1
+            raise
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.rows_flushed += len(rows)
+        self.last_batch = len(rows)
+        self.flush_ms_total += elapsed_ms
+        self.flush_ms_max = max(self.flush_ms_max, elapsed_ms)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self._rows),
+            "peak_depth": self.peak_depth,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "failed_flushes": self.failed_flushes,
+            "avg_batch": round(self.rows_flushed / self.flushes, 2) if self.flushes else 0.0,
+            "last_batch": self.last_batch,
+            "flush_ms_avg": round(self.flush_ms_total / self.flushes, 3) if self.flushes else 0.0,
+            "flush_ms_max": round(self.flush_ms_max, 3),
+        }
+
+
+activity_buffer = ActivityBuffer()
@@ -1,10 +1,23 @@
 from datetime import datetime
-from db_connection import get_connection
+from db_connection import pooled_connection
+from activity_buffer import activity_buffer
+from auth_feature_store import auth_features
+from config import ROLLING_AUTH_FEATURES
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _validate(session_id: str, endpoint: str, http_method: str) -> None:
+    """Validate inputs."""
+    if not session_id or not isinstance(session_id, str):
+        raise ValueError("Invalid session_id")
+    if not endpoint or not isinstance(endpoint, str):
+        raise ValueError("Invalid endpoint")
+    if http_method not in ["GET", "POST", "PUT", "DELETE", "PATCH"]:
+        raise ValueError("Invalid HTTP method")
+
+
 def log_request(
     *,
     session_id: str,
@@ -19,50 +32,42 @@ def log_request(
 ) -> None:
     """Log a request to activity_logs table."""
     
-    # Validate inputs
-    if not session_id or not isinstance(session_id, str):
-        raise ValueError("Invalid session_id")
-    if not endpoint or not isinstance(endpoint, str):
-        raise ValueError("Invalid endpoint")
-    if http_method not in ["GET", "POST", "PUT", "DELETE", "PATCH"]:
-        raise ValueError("Invalid HTTP method")
+    _validate(session_id, endpoint, http_method)
 
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            INSERT INTO activity_logs (
-                user_id,
-                session_id,
-                ip_address,
-                endpoint,
-                http_method,
-                response_status,
-                bytes_sent,
-                bytes_received,
-                processing_time_ms,
-                timestamp
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO activity_logs (
+                    user_id,
+                    session_id,
+                    ip_address,
+                    endpoint,
+                    http_method,
+                    response_status,
+                    bytes_sent,
+                    bytes_received,
+                    processing_time_ms,
+                    timestamp
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                (
+                    user_id,
+                    session_id,
+                    ip_address,
+                    endpoint,
+                    http_method,
+                    response_status,
+                    bytes_sent,
+                    bytes_received,
+                    processing_time_ms,
+                    datetime.now(),
+                ),
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            (
-                user_id,
-                session_id,
-                ip_address,
-                endpoint,
-                http_method,
-                response_status,
-                bytes_sent,
-                bytes_received,
-                processing_time_ms,
-                datetime.now(),
-            ),
-        )
-
-        conn.commit()
-        logger.debug(f"Request logged for session {session_id} to {endpoint}")
+
+            conn.commit()
+            logger.debug(f"Request logged for session {session_id} to {endpoint}")
 
     except ValueError as e:
         logger.warning(f"Invalid input: {str(e)}")
@@ -71,8 +76,77 @@ def log_request(
         logger.error(f"Failed to log request: {str(e)}")
         raise Exception("Failed to log request")
 
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+
+async def log_request_async(
+    *,
+    session_id: str,
+    user_id: int,
+    ip_address: str,
+    endpoint: str,
+    http_method: str,
+    response_status: int,
+    bytes_sent: int,
+    bytes_received: int,
+    processing_time_ms: int,
+) -> None:
+    """Async log_request(); the row is committed with others in one COPY."""
+
+    _validate(session_id, endpoint, http_method)
+
+    row = (
+        user_id,
+        session_id,
+        ip_address,
+        endpoint,
+        http_method,
+        response_status,
+        bytes_sent,
+        bytes_received,
+        processing_time_ms,
+        datetime.now(),
+    )
+
+    try:
+        await activity_buffer.submit(row)
+        if ROLLING_AUTH_FEATURES:
+            auth_features.record_rows([row])
+
+        logger.debug(f"Request logged for session {session_id} to {endpoint}")
+
+    except Exception as e:
+        logger.error(f"Failed to log request: {str(e)}")
+        raise Exception("Failed to log request")
+
+
+async def log_requests_async(events: list) -> None:
+    """
+    Log many requests with a single COPY.
+
+    Each event is a dict of log_request() keyword arguments, optionally
+    with a "timestamp" (datetime) of when the client saw the request.
+    """
+    rows = []
+    for event in events:
+        _validate(event["session_id"], event["endpoint"], event["http_method"])
+        rows.append((
+            event["user_id"],
+            event["session_id"],
+            event["ip_address"],
+            event["endpoint"],
+            event["http_method"],
+            event["response_status"],
+            event["bytes_sent"],
+            event["bytes_received"],
+            event["processing_time_ms"],
+            event.get("timestamp") or datetime.now(),
+        ))
+
+    try:
+        await activity_buffer.write(rows)
+        if ROLLING_AUTH_FEATURES:
+            auth_features.record_rows(rows)
+        logger.debug(f"Logged {len(rows)} requests in one batch")
+
+    except Exception as e:
+        logger.error(f"Failed to log request batch: {str(e)}")
+        raise Exception("Failed to log requests")
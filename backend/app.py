@@ -1,16 +1,28 @@
 from time import perf_counter
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
+import json
+import uuid
+from typing import Optional
 from fastapi import FastAPI, Request, HTTPException, Query, Depends, Header
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from db_init import init_db
-
-from session_manager import create_session, session_exists, logout_session, get_session_info
-from activity_logger import log_request
-from features_auth import extract_auth_features
-from user_manager import authenticate_user, create_user, get_user_by_username
+from db_connection import pool_stats, close_pool
+from async_db import init_async_pool, close_async_pool, async_pool_stats
+from activity_buffer import activity_buffer
+from auth_feature_store import auth_features
+from session_cache import session_cache
+
+from session_manager import (
+    create_session_async, session_exists_async, logout_session_async, get_session_info_async
+)
+from activity_logger import log_request_async, log_requests_async
+from features_auth import extract_auth_features_async
+from user_manager import authenticate_user_async, create_user_async, get_user_by_username_async
 from auth import create_access_token, create_refresh_token, decode_token
+from config import TRACK_BATCH_MAX_EVENTS, TRACK_EVENT_MAX_AGE_SECONDS, ROLLING_AUTH_FEATURES, AUTH_FEATURES_WARM_START
 from models import UserRegister, UserLogin, TokenResponse, UserResponse, SessionResponse
 
 # Setup logging
@@ -22,8 +34,20 @@ app = FastAPI(title="Sentinel AI", version="2.0.0")
 from db_init import init_db
 
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     init_db()
+    await init_async_pool()
+    activity_buffer.start()
+    if ROLLING_AUTH_FEATURES and AUTH_FEATURES_WARM_START:
+        await auth_features.load()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Commit whatever /track queued before the pool goes away
+    await activity_buffer.stop()
+    await close_async_pool()
+    close_pool()
 
 # Add CORS middleware
 app.add_middleware(
@@ -98,10 +122,10 @@ async def register(request: Request):
             raise HTTPException(status_code=400, detail="Missing required fields")
         
         # Check if user already exists
-        if get_user_by_username(username):
+        if await get_user_by_username_async(username):
             raise HTTPException(status_code=409, detail="Username already exists")
         
-        user_id = create_user(username, email, password)
+        user_id = await create_user_async(username, email, password)
         
         return UserResponse(user_id, username, email, datetime.now(), True)
     
@@ -125,7 +149,7 @@ async def login(request: Request):
             raise HTTPException(status_code=400, detail="Missing username or password")
         
         # Authenticate user
-        user = authenticate_user(username, password)
+        user = await authenticate_user_async(username, password)
         if not user:
             logger.warning(f"Login failed for user: {username}")
             raise HTTPException(status_code=401, detail="Invalid username or password")
@@ -137,7 +161,7 @@ async def login(request: Request):
         # Create session
         ip = request.client.host or "unknown"
         ua = request.headers.get("user-agent", "unknown")
-        session_id = create_session(user["user_id"], ip, ua)
+        session_id = await create_session_async(user["user_id"], ip, ua)
         
         logger.info(f"Login successful: user_id={user['user_id']}, username={user['username']}")
         
@@ -199,12 +223,12 @@ async def logout(
         user_id = token_payload.get("user_id")
         
         # Verify session exists and belongs to user
-        session_info = get_session_info(session_id)
+        session_info = await get_session_info_async(session_id)
         if not session_info or session_info["user_id"] != user_id:
             raise HTTPException(status_code=404, detail="Session not found")
         
         # Logout the session
-        logout_session(session_id)
+        await logout_session_async(session_id)
         
         logger.info(f"User logged out: user_id={user_id}, session_id={session_id}")
         
@@ -235,7 +259,7 @@ async def track(
         raise HTTPException(status_code=400, detail="Invalid session_id format")
 
     try:
-        if not session_exists(session_id):
+        if not await session_exists_async(session_id):
             logger.warning(f"Session not found or timed out: {session_id}")
             raise HTTPException(status_code=404, detail="Session not found or expired")
     except Exception as e:
@@ -255,7 +279,7 @@ async def track(
         
         processing_time_ms = int((perf_counter() - start) * 1000)
 
-        log_request(
+        await log_request_async(
             session_id=session_id,
             user_id=user_id,
             ip_address=ip,
@@ -267,7 +291,7 @@ async def track(
             processing_time_ms=processing_time_ms,
         )
 
-        features = extract_auth_features(session_id)
+        features = await extract_auth_features_async(session_id)
 
         logger.info(f"Track logged: session_id={session_id}, user_id={user_id}, status={response_status}")
 
@@ -285,6 +309,156 @@ async def track(
         raise HTTPException(status_code=500, detail="Failed to log request")
 
 
+def parse_track_events(body: bytes, content_type: str) -> list:
+    """Decode a /track/batch body: a JSON array, or NDJSON (one event per line)."""
+    if "ndjson" in content_type or not body.lstrip().startswith(b"["):
+        events = [json.loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        events = json.loads(body)
+
+    if not isinstance(events, list) or not all(isinstance(e, dict) for e in events):
+        raise ValueError("Body must be a JSON array or NDJSON stream of event objects")
+    return events
+
+
+def parse_event_time(value: str, now: datetime) -> datetime:
+    """
+    ISO-8601 event time as the naive local time activity_logs stores,
+    clamped to the last TRACK_EVENT_MAX_AGE_SECONDS before now so a
+    client cannot place events outside the feature window.
+    """
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return min(max(timestamp, now - timedelta(seconds=TRACK_EVENT_MAX_AGE_SECONDS)), now)
+
+
+def session_id_error(session_id) -> Optional[str]:
+    """Why session_id cannot name a session (a canonical UUID string), or None."""
+    if not isinstance(session_id, str):
+        return "Invalid session_id format"
+    try:
+        if str(uuid.UUID(session_id)) != session_id.lower():
+            return "Invalid session_id format"
+    except ValueError:
+        return "Invalid session_id format"
+    return None
+
+
+@app.post("/track/batch")
+async def track_batch(
+    request: Request,
+    token_payload: dict = Depends(verify_token)
+):
+    """Log a burst of events for one or more sessions.
+
+    Body: a JSON array, or NDJSON (Content-Type: application/x-ndjson), of
+    {"session_id": ..., "endpoint": ..., "http_method": "GET",
+     "response_status": 200, "bytes_sent": 0, "bytes_received": 0,
+     "processing_time_ms": 0, "timestamp": ISO-8601}
+    where only session_id and endpoint are required.  Every event is
+    logged with the caller's address, and client timestamps are clamped
+    to the last TRACK_EVENT_MAX_AGE_SECONDS.
+
+    The token is checked once per request and each session once per
+    batch; all accepted events are written in one COPY, then features
+    are computed once per session.  Events whose session_id is not a
+    UUID string, or names an unknown or expired session, are reported
+    under "rejected" and not logged; the rest of the batch still is.
+    """
+    try:
+        events = parse_track_events(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch: {str(e)}")
+
+    if not events:
+        raise HTTPException(status_code=400, detail="Empty batch")
+    if len(events) > TRACK_BATCH_MAX_EVENTS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {TRACK_BATCH_MAX_EVENTS} events")
+
+    user_id = token_payload.get("user_id")
+    ip = request.client.host or "unknown"
+
+    # Group by session while building rows; a malformed session_id only
+    # rejects its own events
+    now = datetime.now()
+    by_session, malformed = {}, {}
+    try:
+        for index, event in enumerate(events):
+            session_id = event["session_id"]
+            if session_id_error(session_id):
+                key = session_id if isinstance(session_id, str) else json.dumps(session_id)
+                malformed[key] = malformed.get(key, 0) + 1
+                continue
+            timestamp = event.get("timestamp")
+            by_session.setdefault(session_id, []).append({
+                "session_id": session_id,
+                "user_id": user_id,
+                "ip_address": ip,
+                "endpoint": event["endpoint"],
+                "http_method": event.get("http_method", "GET"),
+                "response_status": int(event.get("response_status", 200)),
+                "bytes_sent": int(event.get("bytes_sent", 0)),
+                "bytes_received": int(event.get("bytes_received", 0)),
+                "processing_time_ms": int(event.get("processing_time_ms", 0)),
+                "timestamp": parse_event_time(timestamp, now) if timestamp else None,
+            })
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid event #{index}: {str(e)}")
+
+    # Look each distinct session up once
+    async def check(session_id):
+        if not await session_exists_async(session_id):
+            return "Session not found or expired"
+        return None
+
+    try:
+        reasons = await asyncio.gather(*(check(sid) for sid in by_session))
+    except Exception as e:
+        logger.error(f"Session lookup failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    accepted, rejected = [], []
+    for session_id, count in malformed.items():
+        logger.warning(f"Batch events rejected for session {session_id}: Invalid session_id format")
+        rejected.append({"session_id": session_id, "events": count, "reason": "Invalid session_id format"})
+    for (session_id, session_rows), reason in zip(by_session.items(), reasons):
+        if reason:
+            logger.warning(f"Batch events rejected for session {session_id}: {reason}")
+            rejected.append({"session_id": session_id, "events": len(session_rows), "reason": reason})
+        else:
+            accepted.append(session_id)
+
+    try:
+        await log_requests_async([row for sid in accepted for row in by_session[sid]])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid event: {str(e)}")
+    except Exception as e:
+        logger.error(f"Track batch failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to log requests")
+
+    try:
+        features = await asyncio.gather(*(extract_auth_features_async(sid) for sid in accepted))
+    except Exception as e:
+        logger.error(f"Track batch feature extraction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to extract features")
+
+    logged = sum(len(by_session[sid]) for sid in accepted)
+    logger.info(f"Track batch logged: user_id={user_id}, events={logged}, sessions={len(accepted)}, "
+                f"rejected_sessions={len(rejected)}")
+
+    return {
+        "status": "logged",
+        "user_id": user_id,
+        "accepted": logged,
+        "sessions": {
+            sid: {"events": len(by_session[sid]), "features": f}
+            for sid, f in zip(accepted, features)
+        },
+        "rejected": rejected,
+    }
+
+
 # ============ SESSION MANAGEMENT ENDPOINTS ============
 
 @app.get("/sessions/{session_id}")
@@ -296,7 +470,7 @@ async def get_session(
     try:
         user_id = token_payload.get("user_id")
         
-        session_info = get_session_info(session_id)
+        session_info = await get_session_info_async(session_id)
         if not session_info:
             raise HTTPException(status_code=404, detail="Session not found")
         
@@ -349,6 +523,18 @@ async def health():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Pool, ingestion and cache metrics for this worker process."""
+    return {
+        "db_pool": pool_stats(),
+        "async_db_pool": async_pool_stats(),
+        "activity_buffer": activity_buffer.stats(),
+        "auth_features": auth_features.stats() if ROLLING_AUTH_FEATURES else None,
+        "session_cache": session_cache.stats()
+    }
+
+
 # ============ ROOT ENDPOINT ============
 
 @app.get("/")
@@ -361,12 +547,15 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "auth": ["/register", "/login", "/refresh", "/logout"],
-            "tracking": ["/track"],
+            "tracking": ["/track", "/track/batch"],
             "session": ["/sessions/{session_id}", "/me"],
-            "health": ["/health"]
+            "health": ["/health", "/metrics"]
         }
     }
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from config import WORKERS
+
+    # uvicorn needs the import string to start more than one worker process
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, workers=WORKERS)
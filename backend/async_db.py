@@ -0,0 +1,110 @@
+"""
+asyncpg connection pool for the FastAPI endpoints.
+
+The async variants in session_manager, activity_logger, features_auth and
+user_manager borrow from this pool, so a slow query suspends only the
+request that issued it instead of blocking the event loop.  The pool is
+opened by the app's startup hook and closed on shutdown.
+"""
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+
+import asyncpg
+
+from config import DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT
+from db_connection import DB_CONFIG, MAX_RETRIES, RETRY_DELAY
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = asyncio.Lock()   # one create_pool() even when first requests race
+_metrics = {
+    "acquisitions": 0,
+    "wait_ms_total": 0.0,
+    "wait_ms_max": 0.0,
+    "timeouts": 0,
+}
+
+
+async def init_async_pool() -> asyncpg.Pool:
+    """Open the process's asyncpg pool (idempotent)."""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    async with _pool_lock:
+        # Another task may have opened it while this one waited
+        if _pool is not None:
+            return _pool
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                _pool = await asyncpg.create_pool(
+                    database=DB_CONFIG["dbname"],
+                    user=DB_CONFIG["user"],
+                    password=DB_CONFIG["password"],
+                    host=DB_CONFIG["host"],
+                    port=int(DB_CONFIG["port"]),
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                )
+                return _pool
+            except (OSError, asyncpg.PostgresError) as e:
+                if attempt < MAX_RETRIES - 1:
+                    logger.warning(f"Async DB pool creation failed (attempt {attempt + 1}). Retrying in {RETRY_DELAY}s...")
+                    await asyncio.sleep(RETRY_DELAY)
+                else:
+                    raise Exception(f"Database connection failed after {MAX_RETRIES} attempts: {str(e)}")
+
+
+async def close_async_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+@asynccontextmanager
+async def acquire():
+    """Borrow a connection, waiting up to DB_POOL_TIMEOUT for a free one."""
+    pool = _pool if _pool is not None else await init_async_pool()
+
+    start = time.perf_counter()
+    try:
+        conn = await pool.acquire(timeout=DB_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        _metrics["timeouts"] += 1
+        raise Exception(f"Timed out after {DB_POOL_TIMEOUT}s waiting for a database connection")
+    waited_ms = (time.perf_counter() - start) * 1000
+
+    _metrics["acquisitions"] += 1
+    _metrics["wait_ms_total"] += waited_ms
+    _metrics["wait_ms_max"] = max(_metrics["wait_ms_max"], waited_ms)
+
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+
+def async_pool_stats() -> dict:
+    """Pool metrics, or None before the pool was opened."""
+    if _pool is None:
+        return None
+
+    size = _pool.get_size()
+    in_use = size - _pool.get_idle_size()
+    acquisitions = _metrics["acquisitions"]
+    return {
+        "min_size": _pool.get_min_size(),
+        "max_size": _pool.get_max_size(),
+        "size": size,
+        "in_use": in_use,
+        "utilization": round(in_use / _pool.get_max_size(), 3),
+        "acquisitions": acquisitions,
+        "wait_ms_avg": round(_metrics["wait_ms_total"] / acquisitions, 3) if acquisitions else 0.0,
+        "wait_ms_max": round(_metrics["wait_ms_max"], 3),
+        "timeouts": _metrics["timeouts"],
+    }
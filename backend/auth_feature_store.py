@@ -0,0 +1,222 @@
+"""
+Rolling per-session auth features, kept in memory.
+
+extract_auth_features() aggregates a session's last 10 minutes of
+activity_logs with a COUNT(DISTINCT ...) on every /track.  This store
+keeps the same numbers incrementally: each logged row is added to its
+session's one-minute bucket (failed and success counts, processing-time
+sum and count), buckets older than the window are evicted, and a read
+merges the live buckets with no SQL at all.
+
+Memory is fixed per bucket, not per event: a bucket also keeps the same
+counts per second, used only when it is the oldest bucket and the window
+edge cuts through it, so the edge has one-second resolution.  Distinct
+IPs are tracked per session as IP -> last seen (at most
+MAX_SESSION_IPS, oldest dropped first), which counts an IP exactly when
+its latest row is inside the window.  NULL status, IP and processing
+time are skipped the way the SQL aggregates skip them.
+
+Each worker process sees only the rows it logged itself, so the store
+is on by default only with a single worker (ROLLING_AUTH_FEATURES).  On
+startup it is rebuilt from the last window of activity_logs
+(AUTH_FEATURES_WARM_START) so a restart does not reset the features.
+"""
+import logging
+import math
+import time
+
+from async_db import acquire
+from config import AUTH_FEATURE_WINDOW_MINUTES
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60
+MAX_SESSION_IPS = 1024  # distinct IPs remembered per session
+SWEEP_INTERVAL = 60.0   # seconds between sweeps for sessions that went idle
+
+# Counter layout shared by buckets and their per-second slots
+FAILED, SUCCESS, PT_SUM, PT_COUNT = range(4)
+
+
+def _add(counts: list, response_status, processing_time_ms):
+    if response_status is not None:
+        counts[FAILED if response_status >= 400 else SUCCESS] += 1
+    if processing_time_ms is not None:
+        counts[PT_SUM] += processing_time_ms
+        counts[PT_COUNT] += 1
+
+
+class _Bucket:
+    __slots__ = ("counts", "seconds")
+
+    def __init__(self):
+        self.counts = [0, 0, 0, 0]
+        self.seconds = {}    # second -> counts, for reads on the window edge
+
+    def add(self, second: int, response_status, processing_time_ms):
+        _add(self.counts, response_status, processing_time_ms)
+        counts = self.seconds.get(second)
+        if counts is None:
+            counts = self.seconds[second] = [0, 0, 0, 0]
+        _add(counts, response_status, processing_time_ms)
+
+
+class _Session:
+    __slots__ = ("buckets", "ips")
+
+    def __init__(self):
+        self.buckets = {}
+        self.ips = {}        # ip -> latest timestamp
+
+    def see_ip(self, ip_address, ts: float):
+        ips = self.ips
+        if ts <= ips.get(ip_address, -math.inf):
+            return
+        ips[ip_address] = ts
+        if len(ips) > MAX_SESSION_IPS:
+            del ips[min(ips, key=ips.get)]
+
+
+class RollingAuthFeatures:
+    """Per-session minute buckets over the auth-feature window"""
+
+    def __init__(self, window_seconds: float = AUTH_FEATURE_WINDOW_MINUTES * 60,
+                 bucket_seconds: int = BUCKET_SECONDS):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self._sessions = {}
+        self._next_sweep = time.time() + SWEEP_INTERVAL
+
+        self.updates = 0
+        self.reads = 0
+        self.evicted_buckets = 0
+        self.evicted_sessions = 0
+
+    # ---------- updates ----------
+
+    def record(self, session_id: str, timestamp, response_status, ip_address, processing_time_ms):
+        ts = timestamp.timestamp()
+        now = time.time()
+        if ts < now - self.window_seconds:
+            return
+
+        session = self._sessions.get(str(session_id))
+        if session is None:
+            session = self._sessions[str(session_id)] = _Session()
+
+        second = int(ts)
+        index = second // self.bucket_seconds
+        bucket = session.buckets.get(index)
+        if bucket is None:
+            bucket = session.buckets[index] = _Bucket()
+        bucket.add(second, response_status, processing_time_ms)
+        if ip_address is not None:
+            session.see_ip(ip_address, ts)
+        self.updates += 1
+
+        if now >= self._next_sweep:
+            self.evict(now)
+
+    def record_rows(self, rows: list):
+        """Add activity_logs rows in activity_buffer.ACTIVITY_COLUMNS order."""
+        for (user_id, session_id, ip_address, endpoint, http_method, response_status,
+             bytes_sent, bytes_received, processing_time_ms, timestamp) in rows:
+            self.record(session_id, timestamp, response_status, ip_address, processing_time_ms)
+
+    # ---------- reads ----------
+
+    def row(self, session_id: str, now: float = None) -> tuple:
+        """
+        (failed, success, unique IPs, average processing time or None) over
+        the window ending now, in the column order of AUTH_FEATURES_QUERY.
+        O(buckets + seconds in the edge bucket + IPs); no per-event work.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.window_seconds
+        self.reads += 1
+
+        session = self._sessions.get(str(session_id))
+        if session is None:
+            return 0, 0, 0, None
+
+        totals = [0, 0, 0, 0]
+        edge_second = int(cutoff)
+        edge = edge_second // self.bucket_seconds
+        buckets = session.buckets
+
+        for index in list(buckets):
+            bucket = buckets[index]
+            if index < edge:
+                del buckets[index]
+                self.evicted_buckets += 1
+            elif index > edge:
+                counts = bucket.counts
+                for field in range(4):
+                    totals[field] += counts[field]
+            else:
+                for second, counts in bucket.seconds.items():
+                    if second >= edge_second:
+                        for field in range(4):
+                            totals[field] += counts[field]
+
+        ips = session.ips
+        for ip_address in [ip for ip, ts in ips.items() if ts < cutoff]:
+            del ips[ip_address]
+
+        if not buckets:
+            del self._sessions[str(session_id)]
+
+        failed, success, pt_sum, pt_count = totals
+        return failed, success, len(ips), (pt_sum / pt_count if pt_count else None)
+
+    # ---------- eviction ----------
+
+    def evict(self, now: float = None):
+        """Drop buckets that left the window, and sessions left with none."""
+        now = time.time() if now is None else now
+        edge = int(now - self.window_seconds) // self.bucket_seconds
+        self._next_sweep = now + SWEEP_INTERVAL
+
+        for session_id in list(self._sessions):
+            buckets = self._sessions[session_id].buckets
+            for index in [i for i in buckets if i < edge]:
+                del buckets[index]
+                self.evicted_buckets += 1
+            if not buckets:
+                del self._sessions[session_id]
+                self.evicted_sessions += 1
+
+    def forget(self, session_id: str):
+        self._sessions.pop(str(session_id), None)
+
+    # ---------- warm start ----------
+
+    async def load(self):
+        """Rebuild the store from the current window of activity_logs."""
+        async with acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT session_id, timestamp, response_status, ip_address, processing_time_ms
+                FROM activity_logs
+                WHERE timestamp >= NOW() - make_interval(secs => $1)
+                """,
+                float(self.window_seconds),
+            )
+
+        self._sessions.clear()
+        for session_id, timestamp, status, ip, pt in rows:
+            self.record(session_id, timestamp, status, ip, pt)
+        logger.info(f"Rolling auth features loaded: {len(rows)} rows, {len(self._sessions)} sessions")
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "buckets": sum(len(s.buckets) for s in self._sessions.values()),
+            "updates": self.updates,
+            "reads": self.reads,
+            "evicted_buckets": self.evicted_buckets,
+            "evicted_sessions": self.evicted_sessions,
+        }
+
+
+auth_features = RollingAuthFeatures()
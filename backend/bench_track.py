@@ -0,0 +1,134 @@
+"""
+/track latency under concurrency.
+
+Registers and logs in a benchmark user against a running backend, then
+drives GET /track from an increasing number of in-flight clients (one
+keep-alive connection each) and reports throughput and p50/p99 latency
+per level.  With --batch N each request instead POSTs N events to
+/track/batch, and the events/s column shows the per-event gain.
+
+    uvicorn app:app --port 8000 &
+    python bench_track.py --port 8000 --levels 1 8 32 128 --duration 10
+    python bench_track.py --port 8000 --batch 100
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+
+class Client:
+    """Minimal HTTP/1.1 keep-alive client on asyncio streams"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method: str, path: str, body=None, token: str = None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        payload = json.dumps(body).encode() if body is not None else b""
+        headers = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(payload)}",
+        ]
+        if body is not None:
+            headers.append("Content-Type: application/json")
+        if token:
+            headers.append(f"Authorization: Bearer {token}")
+        self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length) if length else b""
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+async def login(host: str, port: int):
+    client = Client(host, port)
+    username = f"bench_{uuid.uuid4().hex[:8]}"
+    password = "bench-password"
+    await client.request("POST", "/register",
+                         {"username": username, "email": f"{username}@bench.local", "password": password})
+    status, data = await client.request("POST", "/login", {"username": username, "password": password})
+    await client.close()
+    if status != 200:
+        raise SystemExit(f"login failed ({status}): {data.decode()}")
+    body = json.loads(data)
+    return body["access_token"], body["session_id"]
+
+
+async def drive(host: str, port: int, method: str, path: str, body, token: str, deadline: float,
+                latencies: list, errors: list):
+    client = Client(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status, _ = await client.request(method, path, body, token=token)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        await client.close()
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def benchmark(host: str, port: int, levels: list, duration: float, batch: int = 0):
+    token, session_id = await login(host, port)
+    if batch:
+        method, path = "POST", "/track/batch"
+        body = [{"session_id": session_id, "endpoint": "/bench"} for _ in range(batch)]
+    else:
+        method, path, body = "GET", f"/track?session_id={session_id}", None
+    per_request = batch or 1
+
+    print(f"{'in-flight':>9} {'req/s':>9} {'events/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for level in levels:
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            drive(host, port, method, path, body, token, deadline, latencies, errors)
+            for _ in range(level)
+        ))
+
+        latencies.sort()
+        print(f"{level:>9} {len(latencies) / duration:>9.0f} {len(latencies) * per_request / duration:>9.0f} "
+              f"{percentile(latencies, 0.50) * 1000:>9.2f} {percentile(latencies, 0.99) * 1000:>9.2f} "
+              f"{len(errors):>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--batch", type=int, default=0, help="events per /track/batch request")
+    args = parser.parse_args()
+
+    asyncio.run(benchmark(args.host, args.port, args.levels, args.duration, args.batch))
@@ -1,7 +1,17 @@
 import psycopg2
 from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
+import logging
+import os
+import threading
 import time
 
+from config import DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
 DB_CONFIG = {
     "dbname": "sentinel_ai",
     "user": "postgres",
@@ -12,6 +22,7 @@ DB_CONFIG = {
 
 MAX_RETRIES = 3
 RETRY_DELAY = 1  # seconds
+HEALTH_CHECK_IDLE = 30  # seconds idle before a connection is pinged on checkout
 
 
 def get_connection(retry=True):
@@ -26,3 +37,187 @@ def get_connection(retry=True):
                 time.sleep(RETRY_DELAY)
             else:
                 raise Exception(f"Database connection failed after {MAX_RETRIES} attempts: {str(e)}")
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of PostgreSQL connections.
+
+    Wraps psycopg2's ThreadedConnectionPool, which raises as soon as every
+    connection is out; a semaphore sized to max_size makes callers wait
+    (up to timeout seconds) for one to come back instead.  Connections idle
+    for more than HEALTH_CHECK_IDLE seconds are pinged before being handed
+    out, and closed or broken ones are replaced.
+    """
+
+    def __init__(self, min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE,
+                 timeout: float = DB_POOL_TIMEOUT):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pid = os.getpid()
+
+        self._pool = self._open(min_size, max_size)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquisitions = 0
+        self.waits = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.timeouts = 0
+        self.replaced = 0
+
+    @staticmethod
+    def _open(min_size, max_size):
+        for attempt in range(MAX_RETRIES):
+            try:
+                return ThreadedConnectionPool(min_size, max_size, **DB_CONFIG)
+            except OperationalError as e:
+                if attempt < MAX_RETRIES - 1:
+                    logger.warning(f"DB pool creation failed (attempt {attempt + 1}). Retrying in {RETRY_DELAY}s...")
+                    time.sleep(RETRY_DELAY)
+                else:
+                    raise Exception(f"Database connection failed after {MAX_RETRIES} attempts: {str(e)}")
+
+    def getconn(self):
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise Exception(f"Timed out after {self.timeout}s waiting for a database connection")
+        waited_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.acquisitions += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if waited_ms >= 1:
+                self.waits += 1
+            self.wait_ms_total += waited_ms
+            self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+        return conn
+
+    def _checkout(self):
+        """A healthy connection from the pool, replacing dead ones"""
+        for _ in range(self.max_size + 1):
+            conn = self._pool.getconn()
+            if self._healthy(conn):
+                return conn
+            with self._lock:
+                self.replaced += 1
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+        raise Exception("No healthy database connection available")
+
+    def _healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < HEALTH_CHECK_IDLE:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, conn, discard: bool = False):
+        try:
+            if not conn.closed and not discard and \
+                    conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            discard = True
+
+        discard = discard or bool(conn.closed)
+        if discard:
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+
+        try:
+            self._pool.putconn(conn, close=discard)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def close(self):
+        self._pool.closeall()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "utilization": round(self.in_use / self.max_size, 3),
+                "acquisitions": self.acquisitions,
+                "waits": self.waits,
+                "wait_ms_avg": round(self.wait_ms_total / self.acquisitions, 3) if self.acquisitions else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "timeouts": self.timeouts,
+                "replaced": self.replaced,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """The process's pool, created on first use (and again in a forked child)."""
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool()
+        return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a pooled connection for the duration of a with block.
+
+    The caller commits; anything left uncommitted is rolled back when the
+    connection goes back, and a connection broken by the block is closed
+    rather than returned to the pool.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    discard = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        discard = True
+        raise
+    finally:
+        pool.putconn(conn, discard=discard)
+
+
+def pool_stats() -> dict:
+    """Pool metrics, or None before the first connection was borrowed."""
+    return _pool.stats() if _pool is not None else None
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
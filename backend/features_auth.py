@@ -1,54 +1,68 @@
-from db_connection import get_connection
+from db_connection import pooled_connection
+from async_db import acquire
+from auth_feature_store import auth_features
+from config import AUTH_FEATURE_WINDOW_MINUTES, ROLLING_AUTH_FEATURES
 import logging
 
 logger = logging.getLogger(__name__)
 
+AUTH_FEATURES_QUERY = """
+    SELECT
+        COUNT(*) FILTER (WHERE response_status >= 400) AS failed_login_count,
+        COUNT(*) FILTER (WHERE response_status < 400)  AS success_login_count,
+        COUNT(DISTINCT ip_address)                      AS unique_ip_count,
+        AVG(processing_time_ms)                            AS avg_response_time
+    FROM activity_logs
+    WHERE session_id = {session_id}
+      AND timestamp >= NOW() - INTERVAL '{window} minutes'
+"""
+
+
+def _to_features(row) -> dict:
+    if not row:
+        return {
+            "failed_login_count": 0,
+            "success_login_count": 0,
+            "unique_ip_count": 0,
+            "avg_response_time": 0,
+        }
+
+    failed, success, unique_ips, avg_rt = row
+
+    return {
+        "failed_login_count": failed or 0,
+        "success_login_count": success or 0,
+        "unique_ip_count": unique_ips or 0,
+        # AVG() arrives as Decimal from either driver
+        "avg_response_time": round(float(avg_rt or 0), 2),
+    }
+
 
 def extract_auth_features(session_id: str) -> dict:
     """Extract authentication features for a given session."""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            SELECT
-                COUNT(*) FILTER (WHERE response_status >= 400) AS failed_login_count,
-                COUNT(*) FILTER (WHERE response_status < 400)  AS success_login_count,
-                COUNT(DISTINCT ip_address)                      AS unique_ip_count,
-                AVG(processing_time_ms)                            AS avg_response_time
-            FROM activity_logs
-            WHERE session_id = %s
-              AND timestamp >= NOW() - INTERVAL '10 minutes'
-            """,
-            (session_id,),
-        )
-
-        row = cur.fetchone()
-
-        if not row:
-            return {
-                "failed_login_count": 0,
-                "success_login_count": 0,
-                "unique_ip_count": 0,
-                "avg_response_time": 0,
-            }
-
-        failed, success, unique_ips, avg_rt = row
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute(AUTH_FEATURES_QUERY.format(session_id="%s", window=AUTH_FEATURE_WINDOW_MINUTES), (session_id,))
+            row = cur.fetchone()
 
-        return {
-            "failed_login_count": failed or 0,
-            "success_login_count": success or 0,
-            "unique_ip_count": unique_ips or 0,
-            "avg_response_time": round(avg_rt or 0, 2),
-        }
+        return _to_features(row)
 
     except Exception as e:
         logger.error(f"Failed to extract features: {str(e)}")
         raise Exception("Failed to extract features")
 
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+
+async def extract_auth_features_async(session_id: str) -> dict:
+    """Async extract_auth_features(); served from the rolling store when it is enabled."""
+    if ROLLING_AUTH_FEATURES:
+        return _to_features(auth_features.row(session_id))
+
+    try:
+        async with acquire() as conn:
+            row = await conn.fetchrow(AUTH_FEATURES_QUERY.format(session_id="$1", window=AUTH_FEATURE_WINDOW_MINUTES), session_id)
+
+        return _to_features(row)
+
+    except Exception as e:
+        logger.error(f"Failed to extract features: {str(e)}")
+        raise Exception("Failed to extract features")
@@ -1,37 +1,32 @@
-from db_connection import get_connection
+from db_connection import pooled_connection
 
 def get_session_features(session_id):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # Request count
-    cur.execute("""
-        SELECT COUNT(*)
-        FROM activity_logs
-        WHERE session_id = %s
-    """, (session_id,))
-    req_count = cur.fetchone()[0]
-
-    # Session duration
-    cur.execute("""
-        SELECT
-            EXTRACT(EPOCH FROM (MAX(request_time) - MIN(request_time)))
-        FROM activity_logs
-        WHERE session_id = %s
-    """, (session_id,))
-    duration = cur.fetchone()[0] or 0
-
-    # Failed logins
-    cur.execute("""
-        SELECT COUNT(*)
-        FROM auth_logs
-        WHERE session_id = %s
-        AND event_type = 'LOGIN_FAIL'
-    """, (session_id,))
-    failed = cur.fetchone()[0]
-
-    cur.close()
-    conn.close()
+    with pooled_connection() as conn, conn.cursor() as cur:
+        # Request count
+        cur.execute("""
+            SELECT COUNT(*)
+            FROM activity_logs
+            WHERE session_id = %s
+        """, (session_id,))
+        req_count = cur.fetchone()[0]
+
+        # Session duration
+        cur.execute("""
+            SELECT
+                EXTRACT(EPOCH FROM (MAX(request_time) - MIN(request_time)))
+            FROM activity_logs
+            WHERE session_id = %s
+        """, (session_id,))
+        duration = cur.fetchone()[0] or 0
+
+        # Failed logins
+        cur.execute("""
+            SELECT COUNT(*)
+            FROM auth_logs
+            WHERE session_id = %s
+            AND event_type = 'LOGIN_FAIL'
+        """, (session_id,))
+        failed = cur.fetchone()[0]
 
     return {
         "request_count": req_count,
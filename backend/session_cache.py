@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import SESSION_CACHE_TTL, SESSION_CACHE_SIZE
+
+MISS = object()
+
+
+class SessionCache:
+    """
+    Bounded TTL cache of user_sessions rows, keyed by session_id.
+
+    A session that does not exist is cached too (as None), so a client
+    retrying a bad id does not reach Postgres every time.  Entries expire
+    after ttl seconds and the least recently used are dropped past
+    maxsize; logout_session() invalidates its entry directly.  Timeouts
+    are judged from the cached login_time on every read, so caching never
+    keeps an expired session alive.
+
+    A lookup takes generation() before it queries Postgres and passes it
+    to put(); invalidate() bumps the key's generation, so a row read
+    before a logout is dropped instead of cached after it.
+    """
+
+    def __init__(self, ttl: float = SESSION_CACHE_TTL, maxsize: int = SESSION_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._generations = OrderedDict()   # session_id -> invalidation count
+        self._epoch = 0                     # bumped when generations are dropped
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    def get(self, session_id: str):
+        """The cached row (None for a known-missing session), or MISS."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return MISS
+
+            expires_at, row = entry
+            if expires_at <= time.monotonic():
+                del self._entries[session_id]
+                self.misses += 1
+                self.expired += 1
+                return MISS
+
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            if row is None:
+                self.negative_hits += 1
+            return row
+
+    def generation(self, session_id: str) -> tuple:
+        """Token to pass to put() for a row about to be fetched"""
+        with self._lock:
+            return self._epoch, self._generations.get(session_id, 0)
+
+    def put(self, session_id: str, row, generation: tuple = None) -> None:
+        """Cache a row; skipped if the key was invalidated since `generation`"""
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(session_id, 0)):
+                self.stale_puts += 1
+                return
+
+            self._entries[session_id] = (time.monotonic() + self.ttl, row)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, session_id: str = None) -> None:
+        """Forget one session, or all of them"""
+        with self._lock:
+            if session_id is None:
+                self._entries.clear()
+                self._generations.clear()
+                self._epoch += 1
+                return
+
+            self._generations[session_id] = self._generations.get(session_id, 0) + 1
+            self._generations.move_to_end(session_id)
+            if len(self._generations) > self.maxsize:
+                # Forgetting a count could let a stale put through; a new
+                # epoch turns away every lookup in flight instead
+                self._generations.popitem(last=False)
+                self._epoch += 1
+
+            if self._entries.pop(session_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_puts": self.stale_puts,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+session_cache = SessionCache()
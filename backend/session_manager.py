@@ -1,43 +1,87 @@
 import uuid
 from datetime import datetime, timedelta
-from db_connection import get_connection
+from db_connection import pooled_connection
+from async_db import acquire
+from session_cache import session_cache, MISS
 from config import SESSION_TIMEOUT_MINUTES
 import logging
 
 logger = logging.getLogger(__name__)
 
+SESSION_QUERY = """
+    SELECT session_id, user_id, ip_address, login_time, logout_time, is_authenticated
+    FROM user_sessions
+    WHERE session_id = {session_id}
+"""
+
+
+def _is_valid(session_id: str, row) -> tuple:
+    """(valid, timed out) for a user_sessions row; row is None for a missing session."""
+    if not row:
+        return False, False
+
+    login_time, logout_time = row[3], row[4]
+
+    # Check if session has been logged out
+    if logout_time is not None:
+        return False, False
+
+    # Check if session has timed out
+    timeout_threshold = datetime.now() - timedelta(minutes=SESSION_TIMEOUT_MINUTES)
+    if login_time < timeout_threshold:
+        logger.warning(f"Session {session_id} has timed out")
+        return False, True
+
+    return True, False
+
+
+def _to_info(row) -> dict:
+    if not row:
+        return None
+
+    return {
+        "session_id": row[0],
+        "user_id": row[1],
+        "ip_address": row[2],
+        "login_time": row[3],
+        "logout_time": row[4],
+        "is_authenticated": row[5],
+        "expires_at": row[3] + timedelta(minutes=SESSION_TIMEOUT_MINUTES)
+    }
+
 
 def create_session(user_id: int, ip_address: str, user_agent: str) -> str:
     """Create a new session and store in user_sessions table."""
     session_id = str(uuid.uuid4())
+    login_time = datetime.now()
 
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            INSERT INTO user_sessions (
-                session_id,
-                user_id,
-                ip_address,
-                user_agent,
-                login_time,
-                is_authenticated
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO user_sessions (
+                    session_id,
+                    user_id,
+                    ip_address,
+                    user_agent,
+                    login_time,
+                    is_authenticated
+                )
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """,
+                (
+                    session_id,
+                    user_id,
+                    ip_address,
+                    user_agent,
+                    login_time,
+                    True,
+                ),
             )
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """,
-            (
-                session_id,
-                user_id,
-                ip_address,
-                user_agent,
-                datetime.now(),
-                True,
-            ),
-        )
 
-        conn.commit()
+            conn.commit()
+
+        session_cache.put(session_id, (session_id, user_id, ip_address, login_time, None, True))
         logger.info(f"Session created: {session_id} for user {user_id}")
         return session_id
 
@@ -45,124 +89,174 @@ def create_session(user_id: int, ip_address: str, user_agent: str) -> str:
         logger.error(f"Failed to create session: {str(e)}")
         raise Exception("Failed to create session")
 
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+
+def _session_row(session_id: str):
+    """The session's user_sessions row (None if missing), through the cache."""
+    row = session_cache.get(session_id)
+    if row is not MISS:
+        return row
+
+    # Taken before the query so a logout meanwhile keeps this row out of the cache
+    generation = session_cache.generation(session_id)
+    with pooled_connection() as conn, conn.cursor() as cur:
+        cur.execute(SESSION_QUERY.format(session_id="%s"), (session_id,))
+        row = cur.fetchone()
+
+    session_cache.put(session_id, row, generation)
+    return row
 
 
 def session_exists(session_id: str) -> bool:
     """Check if a session exists and is still valid (not timed out)."""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            SELECT login_time, logout_time FROM user_sessions 
-            WHERE session_id = %s
-            """,
-            (session_id,)
-        )
-        
-        row = cur.fetchone()
-        
-        if not row:
-            return False
-        
-        login_time, logout_time = row
-        
-        # Check if session has been logged out
-        if logout_time is not None:
-            return False
-        
-        # Check if session has timed out
-        timeout_threshold = datetime.now() - timedelta(minutes=SESSION_TIMEOUT_MINUTES)
-        if login_time < timeout_threshold:
-            logger.warning(f"Session {session_id} has timed out")
-            # Auto-logout timed out session
-            logout_session(session_id)
-            return False
-        
-        return True
+        row = _session_row(session_id)
 
     except Exception as e:
         logger.error(f"Failed to check session: {str(e)}")
         raise Exception("Database error")
 
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+    valid, timed_out = _is_valid(session_id, row)
+    if timed_out:
+        # Auto-logout timed out session (after the lookup's connection went back)
+        logout_session(session_id)
+
+    return valid
 
 
 def logout_session(session_id: str) -> None:
     """Mark a session as logged out."""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            UPDATE user_sessions 
-            SET logout_time = %s, is_authenticated = FALSE
-            WHERE session_id = %s
-            """,
-            (datetime.now(), session_id)
-        )
-
-        conn.commit()
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE user_sessions
+                SET logout_time = %s, is_authenticated = FALSE
+                WHERE session_id = %s
+                """,
+                (datetime.now(), session_id)
+            )
+
+            conn.commit()
+
+        session_cache.invalidate(session_id)
         logger.info(f"Session logged out: {session_id}")
 
     except Exception as e:
         logger.error(f"Failed to logout session: {str(e)}")
         raise Exception("Failed to logout")
 
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
-
 
 def get_session_info(session_id: str) -> dict:
     """Get session information."""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            SELECT session_id, user_id, ip_address, login_time, logout_time, is_authenticated
-            FROM user_sessions 
-            WHERE session_id = %s
-            """,
-            (session_id,)
-        )
-        
-        row = cur.fetchone()
-        
-        if not row:
-            return None
-        
-        return {
-            "session_id": row[0],
-            "user_id": row[1],
-            "ip_address": row[2],
-            "login_time": row[3],
-            "logout_time": row[4],
-            "is_authenticated": row[5],
-            "expires_at": row[3] + timedelta(minutes=SESSION_TIMEOUT_MINUTES)
-        }
+        row = _session_row(session_id)
+
+    except Exception as e:
+        logger.error(f"Failed to get session info: {str(e)}")
+        raise Exception("Database error")
+
+    return _to_info(row)
+
+
+# ============ ASYNC VARIANTS (asyncpg, for the FastAPI endpoints) ============
+
+async def create_session_async(user_id: int, ip_address: str, user_agent: str) -> str:
+    """Async create_session()."""
+    session_id = str(uuid.uuid4())
+    login_time = datetime.now()
+
+    try:
+        async with acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO user_sessions (
+                    session_id,
+                    user_id,
+                    ip_address,
+                    user_agent,
+                    login_time,
+                    is_authenticated
+                )
+                VALUES ($1, $2, $3, $4, $5, $6)
+                """,
+                session_id,
+                user_id,
+                ip_address,
+                user_agent,
+                login_time,
+                True,
+            )
+
+        session_cache.put(session_id, (session_id, user_id, ip_address, login_time, None, True))
+        logger.info(f"Session created: {session_id} for user {user_id}")
+        return session_id
+
+    except Exception as e:
+        logger.error(f"Failed to create session: {str(e)}")
+        raise Exception("Failed to create session")
+
+
+async def _session_row_async(session_id: str):
+    """Async _session_row()."""
+    row = session_cache.get(session_id)
+    if row is not MISS:
+        return row
+
+    generation = session_cache.generation(session_id)
+    async with acquire() as conn:
+        record = await conn.fetchrow(SESSION_QUERY.format(session_id="$1"), session_id)
+
+    # asyncpg decodes UUID columns to uuid.UUID; psycopg2 hands back str
+    row = (str(record[0]),) + tuple(record[1:]) if record else None
+    session_cache.put(session_id, row, generation)
+    return row
+
+
+async def session_exists_async(session_id: str) -> bool:
+    """Async session_exists()."""
+    try:
+        row = await _session_row_async(session_id)
+
+    except Exception as e:
+        logger.error(f"Failed to check session: {str(e)}")
+        raise Exception("Database error")
+
+    valid, timed_out = _is_valid(session_id, row)
+    if timed_out:
+        await logout_session_async(session_id)
+
+    return valid
+
+
+async def logout_session_async(session_id: str) -> None:
+    """Async logout_session()."""
+    try:
+        async with acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE user_sessions
+                SET logout_time = $1, is_authenticated = FALSE
+                WHERE session_id = $2
+                """,
+                datetime.now(),
+                session_id,
+            )
+
+        session_cache.invalidate(session_id)
+        logger.info(f"Session logged out: {session_id}")
+
+    except Exception as e:
+        logger.error(f"Failed to logout session: {str(e)}")
+        raise Exception("Failed to logout")
+
+
+async def get_session_info_async(session_id: str) -> dict:
+    """Async get_session_info()."""
+    try:
+        row = await _session_row_async(session_id)
 
     except Exception as e:
         logger.error(f"Failed to get session info: {str(e)}")
         raise Exception("Database error")
 
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+    return _to_info(row)
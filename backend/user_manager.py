@@ -1,5 +1,7 @@
-from db_connection import get_connection
+from db_connection import pooled_connection
+from async_db import acquire
 from auth import hash_password, verify_password
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,65 +12,51 @@ def create_user(username: str, email: str, password: str) -> int:
     hashed_password = hash_password(password)
     
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        cur.execute(
-            """
-            INSERT INTO users (username, email, password_hash, is_active)
-            VALUES (%s, %s, %s, TRUE)
-            RETURNING user_id
-            """,
-            (username, email, hashed_password)
-        )
-        
-        user_id = cur.fetchone()[0]
-        conn.commit()
-        logger.info(f"User created: {username} (id={user_id})")
-        return user_id
-        
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO users (username, email, password_hash, is_active)
+                VALUES (%s, %s, %s, TRUE)
+                RETURNING user_id
+                """,
+                (username, email, hashed_password)
+            )
+
+            user_id = cur.fetchone()[0]
+            conn.commit()
+            logger.info(f"User created: {username} (id={user_id})")
+            return user_id
+
     except Exception as e:
         logger.error(f"Failed to create user: {str(e)}")
         raise Exception("Failed to create user")
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
 
 def get_user_by_username(username: str) -> dict:
     """Fetch user by username."""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        
-        cur.execute(
-            "SELECT user_id, username, email, password_hash, is_active FROM users WHERE username = %s",
-            (username,)
-        )
-        
-        row = cur.fetchone()
-        
-        if not row:
-            return None
-        
-        return {
-            "user_id": row[0],
-            "username": row[1],
-            "email": row[2],
-            "password_hash": row[3],
-            "is_active": row[4]
-        }
-        
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT user_id, username, email, password_hash, is_active FROM users WHERE username = %s",
+                (username,)
+            )
+
+            row = cur.fetchone()
+
+            if not row:
+                return None
+
+            return {
+                "user_id": row[0],
+                "username": row[1],
+                "email": row[2],
+                "password_hash": row[3],
+                "is_active": row[4]
+            }
+
     except Exception as e:
         logger.error(f"Failed to fetch user: {str(e)}")
         raise Exception("Database error")
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
 
 def authenticate_user(username: str, password: str) -> dict:
@@ -86,3 +74,71 @@ def authenticate_user(username: str, password: str) -> dict:
         "username": user["username"],
         "email": user["email"]
     }
+
+
+# ============ ASYNC VARIANTS (asyncpg, for the FastAPI endpoints) ============
+
+async def create_user_async(username: str, email: str, password: str) -> int:
+    """Async create_user()."""
+    # bcrypt is deliberately slow; keep it off the event loop
+    hashed_password = await asyncio.to_thread(hash_password, password)
+
+    try:
+        async with acquire() as conn:
+            user_id = await conn.fetchval(
+                """
+                INSERT INTO users (username, email, password_hash, is_active)
+                VALUES ($1, $2, $3, TRUE)
+                RETURNING user_id
+                """,
+                username, email, hashed_password
+            )
+
+        logger.info(f"User created: {username} (id={user_id})")
+        return user_id
+
+    except Exception as e:
+        logger.error(f"Failed to create user: {str(e)}")
+        raise Exception("Failed to create user")
+
+
+async def get_user_by_username_async(username: str) -> dict:
+    """Async get_user_by_username()."""
+    try:
+        async with acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT user_id, username, email, password_hash, is_active FROM users WHERE username = $1",
+                username
+            )
+
+    except Exception as e:
+        logger.error(f"Failed to fetch user: {str(e)}")
+        raise Exception("Database error")
+
+    if not row:
+        return None
+
+    return {
+        "user_id": row[0],
+        "username": row[1],
+        "email": row[2],
+        "password_hash": row[3],
+        "is_active": row[4]
+    }
+
+
+async def authenticate_user_async(username: str, password: str) -> dict:
+    """Async authenticate_user()."""
+    user = await get_user_by_username_async(username)
+
+    if not user or not user.get("is_active"):
+        return None
+
+    if not await asyncio.to_thread(verify_password, password, user["password_hash"]):
+        return None
+
+    return {
+        "user_id": user["user_id"],
+        "username": user["username"],
+        "email": user["email"]
+    }
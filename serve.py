@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Pre-fork multi-worker launcher for the Sentinel app.
+
+The parent migrates the database, loads and warms the detection model and
+opens the listening socket; then it forks the workers, which share the
+model pages copy-on-write and accept on the same socket.  Session and
+user blocks reach every worker through agent.block_broadcast, and
+session counters are kept in agent.shared_sessions.
+
+    python serve.py --workers 4 --port 5000
+    python serve.py --bench            # throughput at 1, 2, 4 and 8 workers
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_WORKERS = (1, 2, 4, 8)
+BENCH_USERS = 5000
+
+
+def serve(workers, host, port):
+    import app as sentinel
+    from agent.shared_sessions import SharedSessionTable
+
+    sentinel.init_db()
+    sentinel.model_manager.load()
+
+    # Shared by every forked worker; bumped on each session or user block
+    generation = multiprocessing.Value("Q", 0)
+    sentinel.block_broadcast.attach(generation)
+
+    # Session counters and rate windows, so each worker sees every request
+    sentinel.session_cache.attach(SharedSessionTable())
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    port = sock.getsockname()[1]   # the one the OS picked for --port 0
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_run_worker, args=(sentinel.app, host, port, sock.fileno()),
+                        name=f"sentinel-worker-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    print(f"🚀 Serving on http://{host}:{port} with {workers} worker(s)", flush=True)
+
+    def shutdown(signum, frame):
+        for process in processes:
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for process in processes:
+        process.join()
+    sock.close()
+
+
+def _run_worker(app, host, port, fd):
+    from werkzeug.serving import make_server
+
+    # Let the parent's handlers go; terminate() ends the worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    make_server(host, port, app, threaded=True, fd=fd).serve_forever()
+
+
+# ---------- benchmark ----------
+
+def _seed_users(db_path, count):
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+        ((f"bench{i}", "bench") for i in range(count))
+    )
+    conn.commit()
+    conn.close()
+
+
+class _Client:
+    """Minimal keep-alive-free HTTP client that carries the Flask session cookie"""
+
+    def __init__(self, port):
+        self.port = port
+        self.cookie = None
+
+    def request(self, method, path, body=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        headers = {"Cookie": self.cookie} if self.cookie else {}
+        if body is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        set_cookie = response.getheader("Set-Cookie")
+        if set_cookie:
+            self.cookie = set_cookie.split(";", 1)[0]
+        conn.close()
+        return response.status
+
+    def login(self, username):
+        self.cookie = None
+        self.request("GET", "/")
+        return self.request("POST", "/", f"username={username}&password=bench")
+
+
+def _bench_client(port, client_id, clients, duration, results):
+    client = _Client(port)
+    user = client_id
+    done = 0
+    deadline = time.monotonic() + duration
+
+    client.login(f"bench{user}")
+    while time.monotonic() < deadline:
+        status = client.request("GET", "/home")
+        done += 1
+        if status != 200:
+            # Blocked (403) or logged out (302): continue as a fresh user
+            user = (user + clients) % BENCH_USERS
+            client.login(f"bench{user}")
+
+    results.put(done)
+
+
+def _wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as r:
+                if r.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def benchmark(worker_counts=BENCH_WORKERS, clients=16, duration=10.0, port=5099):
+    """Requests/s through the full pipeline (detection included) per worker count"""
+    for workers in worker_counts:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="sentinel-bench-"), "database.db")
+
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--workers", str(workers),
+             "--port", str(port), "--db", db_path],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            _wait_ready(port)
+            _seed_users(db_path, BENCH_USERS)
+
+            results = multiprocessing.Queue()
+            drivers = [
+                multiprocessing.Process(target=_bench_client,
+                                        args=(port, i, clients, duration, results))
+                for i in range(clients)
+            ]
+            for driver in drivers:
+                driver.start()
+            total = sum(results.get() for _ in drivers)
+            for driver in drivers:
+                driver.join()
+
+            print(f"⏱️ {workers} worker(s): {total / duration:8.0f} req/s")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--db", help="SQLite file to use instead of db/database.db")
+    parser.add_argument("--bench", action="store_true", help="run the worker-count benchmark")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.db:
+        import agent.db
+        agent.db.DB_PATH = args.db
+
+    if args.bench:
+        benchmark(clients=args.clients, duration=args.duration)
+    else:
+        serve(args.workers, args.host, args.port)
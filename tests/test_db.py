@@ -0,0 +1,57 @@
+import gc
+import sqlite3
+
+import pytest
+
+from agent import db
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "database.db"))
+    pool = db.ConnectionPool(size=2, timeout=0.1)
+    yield pool
+    pool.close_idle()
+
+
+def test_close_returns_the_connection(pool):
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x)")
+    conn.execute("BEGIN")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.close()
+    conn.close()
+
+    again = pool.acquire()
+    assert again is conn
+    assert not again.in_transaction
+    assert again.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    assert pool.opened == 1
+
+
+def test_pool_is_bounded(pool):
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+
+    second.close()
+    assert pool.acquire() is second
+    first.close()
+
+
+def test_dropped_connection_frees_its_slot(pool):
+    pool.acquire(), pool.acquire()
+    gc.collect()
+    assert pool.opened == 0
+    pool.acquire().close()
+
+
+def test_path_change_reopens(pool, tmp_path, monkeypatch):
+    conn = pool.acquire()
+    conn.close()
+
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "other.db"))
+    other = pool.acquire()
+    assert other is not conn
+    assert other.path == db.DB_PATH
+    other.close()
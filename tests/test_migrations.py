@@ -0,0 +1,104 @@
+import sqlite3
+
+import pytest
+
+from agent import migrations
+
+LATEST = migrations.MIGRATIONS[-1][0]
+
+# Created by migration 2 as shipped, until migration 7 dropped them
+LEGACY_INDEXES = {
+    "idx_security_events_action": "security_events (action_taken)",
+    "idx_security_events_rules": "security_events (triggered_rules)",
+}
+
+
+def _connect():
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _migrated():
+    conn = _connect()
+    migrations.migrate(conn)
+    return conn
+
+
+def _at_version(version, monkeypatch):
+    """A database left at `version` by an older checkout"""
+    conn = _connect()
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "MIGRATIONS", [m for m in migrations.MIGRATIONS if m[0] <= version])
+        migrations.migrate(conn)
+    if 2 <= version < 7:
+        for name, target in LEGACY_INDEXES.items():
+            conn.execute(f"CREATE INDEX {name} ON {target}")
+    return conn
+
+
+def _indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def _schema(conn):
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    return {
+        "columns": {t: [(c["name"], c["type"]) for c in conn.execute(f"PRAGMA table_info({t})")] for t in tables},
+        "indexes": sorted(row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_%'")),
+    }
+
+
+def test_hot_queries_do_not_scan():
+    assert migrations.full_scans(_migrated()) == {}
+
+
+def test_index_scans_are_flagged(monkeypatch):
+    monkeypatch.setitem(
+        migrations.HOT_QUERIES, "test.session_list",
+        ("SELECT DISTINCT session_id FROM request_logs", ())
+    )
+    offenders = migrations.full_scans(_migrated())
+    assert list(offenders) == ["test.session_list"]
+    assert offenders["test.session_list"].startswith("SCAN request_logs USING COVERING INDEX")
+
+
+def test_versions_are_never_reused():
+    numbers = [number for number, _, _ in migrations.MIGRATIONS]
+    assert numbers == list(range(1, LATEST + 1))
+
+
+@pytest.mark.parametrize("version", range(LATEST + 1))
+def test_upgrade_from_every_version(version, monkeypatch):
+    conn = _at_version(version, monkeypatch)
+    assert migrations.migrate(conn) == LATEST
+    assert _schema(conn) == _schema(_migrated())
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_upgrade_backfills_request_times(version, monkeypatch):
+    conn = _at_version(version, monkeypatch)
+    conn.execute("""
+        INSERT INTO user_sessions (session_id, login_time)
+        VALUES ('s', '2026-01-01T00:00:00')
+    """)
+    for request_time in ("2026-01-01T00:00:01", "2026-01-01T00:00:03.500", "2026-01-01T00:00:04"):
+        conn.execute("INSERT INTO request_logs (session_id, request_time) VALUES ('s', ?)", (request_time,))
+
+    migrations.migrate(conn)
+
+    row = conn.execute("SELECT * FROM user_sessions").fetchone()
+    assert row["login_ts"] == 1767225600000
+    assert (row["first_request_ts"], row["last_request_ts"]) == (1767225601000, 1767225604000)
+    assert (row["interval_count"], row["interval_sum"], row["min_request_interval"]) == (2, 3.0, 0.5)
+    assert conn.execute("SELECT COUNT(*) FROM request_logs WHERE request_ts IS NULL").fetchone()[0] == 0
+
+
+def test_dashboard_only_indexes_are_dropped(monkeypatch):
+    conn = _at_version(6, monkeypatch)
+    assert set(LEGACY_INDEXES) <= _indexes(conn)
+
+    migrations.migrate(conn)
+    assert not set(LEGACY_INDEXES) & _indexes(conn)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from agent.ml_tool import FLAT_MAX_BATCH, ForestScorer, _FEATURE_WEIGHTS, _sample_sessions, build_feature_map
+
+
+def _frame(model, sessions):
+    rows = [build_feature_map(s) for s in sessions]
+    return pd.DataFrame([[row[f] for f in model.feature_names_in_] for row in rows],
+                        columns=model.feature_names_in_)
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    # Feature order deliberately differs from build_feature_map's
+    columns = sorted(_FEATURE_WEIGHTS)
+    sessions = _sample_sessions(3000, seed=1)
+    X = pd.DataFrame([[build_feature_map(s)[f] for f in columns] for s in sessions], columns=columns)
+    y = (X["Fwd Packet Length Std"] > 4) | (X["Bwd Header Length"] > 3000)
+    model = RandomForestClassifier(n_estimators=30, random_state=0).fit(X, y)
+    return ForestScorer(model)
+
+
+@pytest.mark.parametrize("size", [1, 64, FLAT_MAX_BATCH, FLAT_MAX_BATCH + 1, 2000])
+def test_proba_matches_predict_proba(scorer, size):
+    sessions = _sample_sessions(size, seed=size)
+    expected = scorer.model.predict_proba(_frame(scorer.model, sessions))
+    assert np.array_equal(scorer.proba(scorer.feature_matrix(sessions)), expected)
+
+
+def test_feature_vector_matches_feature_map(scorer):
+    for session in _sample_sessions(50, seed=7):
+        expected = _frame(scorer.model, [session]).to_numpy(dtype=np.float32)
+        assert np.array_equal(scorer.feature_vector(session), expected)
+        assert np.array_equal(scorer.proba(scorer.feature_vector(session)),
+                              scorer.model.predict_proba(_frame(scorer.model, [session])))
@@ -0,0 +1,32 @@
+import threading
+
+import joblib
+
+from agent.model_manager import ModelManager
+
+
+def test_racing_start_and_load_load_once(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump({"weights": [1, 2, 3]}, path)
+
+    builds = []
+    release = threading.Event()
+
+    def build(model):
+        builds.append(model)
+        release.wait(5)   # hold the first load open while the others arrive
+        return model
+
+    manager = ModelManager(str(path), build=build)
+    manager.start()
+    results = []
+    loaders = [threading.Thread(target=lambda: results.append(manager.load())) for _ in range(4)]
+    for loader in loaders:
+        loader.start()
+    release.set()
+    for loader in loaders:
+        loader.join(5)
+
+    assert len(builds) == 1
+    assert results == [{"weights": [1, 2, 3]}] * 4
+    assert manager.ready
@@ -0,0 +1,83 @@
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+
+import serve
+
+REQUESTS = 20
+SPACING = 0.55   # slow enough that realtime detection leaves the session alone
+TIMEOUT = 60
+
+
+def _poll(condition, what, timeout=TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError(f"timed out waiting for {what}")
+
+
+def _bound_port(log_path):
+    with open(log_path, encoding="utf-8", errors="replace") as log:
+        match = re.search(r"Serving on http://[^:]+:(\d+)", log.read())
+    return match and int(match.group(1))
+
+
+def _settled(db_path):
+    """The session row and request_logs once every worker has flushed"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("""
+            SELECT total_requests, interval_count, avg_request_interval
+            FROM user_sessions
+            WHERE logout_time IS NOT NULL
+        """).fetchone()
+        logged = conn.execute(
+            "SELECT COUNT(*) FROM request_logs WHERE endpoint != '/logout'"
+        ).fetchone()[0]
+    except sqlite3.OperationalError:   # locked by a worker's write
+        return None
+    finally:
+        conn.close()
+    if row is None or row[0] != REQUESTS or logged != REQUESTS:
+        return None
+    return row, logged
+
+
+def test_session_counts_match_request_logs_across_workers(tmp_path):
+    db_path = str(tmp_path / "database.db")
+    log_path = str(tmp_path / "server.log")
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(
+            [sys.executable, serve.__file__, "--workers", "2", "--port", "0", "--db", db_path],
+            cwd=os.path.dirname(serve.__file__),
+            stdout=log, stderr=subprocess.STDOUT
+        )
+    try:
+        port = _poll(lambda: _bound_port(log_path), "the server to bind")
+        serve._wait_ready(port, timeout=TIMEOUT)
+        serve._seed_users(db_path, 1)
+
+        # _Client opens a new connection per request, so the workers share the session
+        client = serve._Client(port)
+        client.login("bench0")
+        for _ in range(REQUESTS):
+            assert client.request("GET", "/home") == 200
+            time.sleep(SPACING)
+        client.request("GET", "/logout")
+
+        # Every worker's write-behind flush and log writer catch up
+        (total_requests, interval_count, avg_request_interval), logged = _poll(
+            lambda: _settled(db_path), "the session counts to reach the database")
+    finally:
+        server.terminate()
+        server.wait()
+
+    assert total_requests == logged == REQUESTS
+    assert interval_count == REQUESTS - 1
+    assert avg_request_interval >= SPACING
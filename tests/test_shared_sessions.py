@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from agent.rate_tracker import RateWindow, WINDOW_SIZE
+from agent.session_cache import SessionState
+from agent.shared_sessions import SharedSessionTable
+
+ROW = dict.fromkeys([
+    "username", "total_requests", "failed_logins", "is_blocked", "avg_request_interval",
+    "max_request_rate", "first_request_ts", "last_request_ts", "interval_count",
+    "interval_sum", "min_request_interval", "interval_m2"
+])
+
+
+def _window(window):
+    return window.count, window.span, window.rate, window.mean_interval, window.min_interval
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_each_worker_sees_the_global_window(seed):
+    """Two workers' copies of one session, fed in a random interleaving"""
+    rng = random.Random(seed)
+    table = SharedSessionTable(slots=8, stripes=2)
+    workers = [SessionState("s", ROW), SessionState("s", ROW)]
+    windows = [state.rate_window for state in workers]
+    for state in workers:
+        assert table.adopt("s", state, 0.0)
+
+    expected = RateWindow()
+    now = 0.0
+    for count in range(1, 8 * WINDOW_SIZE):
+        now += rng.choice([0.01, 0.25, 1.0, 3.0])
+        # Long runs on one worker leave the other more than a window behind
+        state = workers[rng.random() < (0.9 if count < 4 * WINDOW_SIZE else 0.5)]
+        assert table.record("s", state, now, 1000 + now)
+        expected.record(now)
+
+        assert state.total_requests == count
+        assert _window(state.rate_window) == pytest.approx(_window(expected))
+
+    assert [state.rate_window for state in workers] == windows
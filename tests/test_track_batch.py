@@ -0,0 +1,61 @@
+import importlib.util
+import os
+import uuid
+
+import pytest
+
+for module in ("fastapi", "httpx", "asyncpg", "psycopg2", "jose", "passlib", "dotenv"):
+    pytest.importorskip(module)
+
+from fastapi.testclient import TestClient
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+SESSION = str(uuid.uuid4())
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    # The backend imports its siblings by bare name, and its app.py would
+    # clash with the Flask one at the repository root
+    monkeypatch.syspath_prepend(BACKEND)
+    spec = importlib.util.spec_from_file_location("backend_app", os.path.join(BACKEND, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    looked_up, logged = [], []
+
+    async def session_exists(session_id):
+        looked_up.append(session_id)
+        return session_id == SESSION
+
+    async def log_requests(rows):
+        logged.extend(rows)
+
+    async def features(session_id):
+        return {}
+
+    monkeypatch.setattr(module, "session_exists_async", session_exists)
+    monkeypatch.setattr(module, "log_requests_async", log_requests)
+    monkeypatch.setattr(module, "extract_auth_features_async", features)
+    module.app.dependency_overrides[module.verify_token] = lambda: {"user_id": 1}
+
+    # No `with`: startup would open the database pools
+    return TestClient(module.app), looked_up, logged
+
+
+@pytest.mark.parametrize("session_id", [["not", "a", "string"], {"id": SESSION}, "x" * 36])
+def test_malformed_session_id_rejects_only_its_events(backend, session_id):
+    client, looked_up, logged = backend
+    response = client.post("/track/batch", json=[
+        {"session_id": session_id, "endpoint": "/a"},
+        {"session_id": session_id, "endpoint": "/b"},
+        {"session_id": SESSION, "endpoint": "/c"},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["accepted"] == 1
+    assert list(body["sessions"]) == [SESSION]
+    assert [(r["events"], r["reason"]) for r in body["rejected"]] == [(2, "Invalid session_id format")]
+    assert looked_up == [SESSION]
+    assert [row["endpoint"] for row in logged] == ["/c"]
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from agent.tree_ensemble import FlatForest
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "models", "sentinel_rf_model.pkl")
+
+
+def _random_inputs(n_features, size, seed):
+    """float32 rows spread over the feature scales the model sees"""
+    rng = np.random.default_rng(seed)
+    X = rng.random((size, n_features)) * rng.choice([1, 100, 10000], n_features)
+    return X.astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    X = _random_inputs(6, 2000, seed=1)
+    y = (X[:, 0] * X[:, 1] > X[:, 2] * 0.5).astype(int) ^ (X[:, 3] > 50)
+    return RandomForestClassifier(n_estimators=25, random_state=0).fit(X, y)
+
+
+@pytest.mark.parametrize("size", [1, 64, 4096])
+def test_matches_sklearn_bit_for_bit(fitted, size):
+    X = _random_inputs(fitted.n_features_in_, size, seed=size)
+    forest = FlatForest.from_model(fitted)
+    assert np.array_equal(forest.predict_proba(X), fitted.predict_proba(X))
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="shipped model not present")
+@pytest.mark.parametrize("size", [1, 64, 4096])
+def test_matches_shipped_model(size):
+    joblib = pytest.importorskip("joblib")
+    pd = pytest.importorskip("pandas")
+    model = joblib.load(MODEL_PATH)
+
+    X = _random_inputs(model.n_features_in_, size, seed=size)
+    expected = model.predict_proba(pd.DataFrame(X, columns=model.feature_names_in_))
+    assert np.array_equal(FlatForest.from_model(model).predict_proba(X), expected)